@@ -42,8 +42,23 @@ from .source import Source
 from .source_pool import SourcePool
 from .buffer import Buffer
 from .callback_source import CallbackSource
+from .synth import Synth
+from .callback_stream import CallbackStream
+from .playlist import PlaylistStream
+from .stems import StemGroup
 from .exceptions import OalError, OalWarning
-from .loaders import open, stream
+from .loaders import open, stream, playlist, stem_group, load, LoadPolicy, get_audio_info
+from .decoders import Decoder, register_decoder, unregister_decoder, get_decoders
+from .resample import resample_pcm
+from .memory import BufferLedger, get_buffer_ledger
+from .cache import BufferCache, get_buffer_cache
+from .stream_manager import StreamManager, get_stream_manager
+from .adaptive import AdaptiveBuffering
+from .crossfade import Crossfader
+from .telemetry import StreamTelemetry, get_stream_stats, get_all_stream_stats, reset_stream_stats, set_underrun_callback
+from .telemetry import CallbackTelemetry, get_callback_stats, reset_callback_stats, set_callback_histograms
+from .soundbank import SoundBank, build_sound_bank
+from .compression import compress_pcm, get_compression_stats
 from .environment import *
 from .capture import (
     CaptureDevice,
@@ -62,9 +77,44 @@ __all__ = [
     'Source',
     'SourcePool',
     'CallbackSource',
+    'Synth',
+    'CallbackStream',
+    'PlaylistStream',
+    'StemGroup',
     'Buffer',
     'open',
     'stream',
+    'playlist',
+    'stem_group',
+    'load',
+    'LoadPolicy',
+    'get_audio_info',
+    'Decoder',
+    'register_decoder',
+    'unregister_decoder',
+    'get_decoders',
+    'resample_pcm',
+    'BufferLedger',
+    'get_buffer_ledger',
+    'BufferCache',
+    'get_buffer_cache',
+    'StreamManager',
+    'get_stream_manager',
+    'AdaptiveBuffering',
+    'Crossfader',
+    'StreamTelemetry',
+    'get_stream_stats',
+    'get_all_stream_stats',
+    'reset_stream_stats',
+    'set_underrun_callback',
+    'CallbackTelemetry',
+    'get_callback_stats',
+    'reset_callback_stats',
+    'set_callback_histograms',
+    'SoundBank',
+    'build_sound_bank',
+    'compress_pcm',
+    'get_compression_stats',
     'OalError',
     'OalWarning',
     'get_default_device',
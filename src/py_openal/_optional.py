@@ -0,0 +1,53 @@
+import importlib
+from .exceptions import OalError
+
+# Caches the result of probing optional third-party modules. A value of None
+# means the module was probed and is not available.
+_probed_modules = {}
+
+def _optional_import(module_name):
+    """
+    Imports an optional dependency on first use and caches the result.
+
+    Codec backends such as miniaudio and PyOgg are comparatively expensive to
+    import, so they are only loaded when a file that needs them is opened.
+    Failed probes are cached as well, so a missing module is only looked up
+    once per process.
+
+    Args:
+        module_name (str): The name of the module to import.
+
+    Returns:
+        The imported module, or None if it is not installed.
+    """
+    try:
+        return _probed_modules[module_name]
+    except KeyError:
+        pass
+
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        module = None
+    _probed_modules[module_name] = module
+    return module
+
+def _is_available(module_name):
+    """Returns True if the optional dependency can be imported."""
+    return _optional_import(module_name) is not None
+
+def _require_numpy(feature):
+    """
+    Imports NumPy for a feature that cannot work without it.
+
+    Args:
+        feature (str): What needs NumPy, for the error message (e.g.,
+                       'Resampling').
+
+    Raises:
+        OalError: If NumPy is not installed.
+    """
+    np = _optional_import('numpy')
+    if np is None:
+        raise OalError(f"{feature} requires NumPy, which is not installed.")
+    return np
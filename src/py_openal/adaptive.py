@@ -0,0 +1,115 @@
+import time
+from collections import namedtuple
+
+# Counters of a stream's adaptive buffering. `min_headroom` is the smallest
+# queued duration (seconds) seen at an update in the current window.
+AdaptationStats = namedtuple('AdaptationStats', ['buffer_count', 'buffer_size', 'grows', 'shrinks',
+                                                 'underruns', 'min_headroom'])
+
+GROW = 1
+SHRINK = -1
+
+class AdaptiveBuffering:
+    """
+    Bounds and thresholds for a SourceStream that tunes its own buffering.
+
+    The stream measures its headroom (the audio still queued when `update()`
+    runs) and watches for underruns:
+
+    - After an underrun, or when the headroom drops below `low_headroom`,
+      it grows: first by adding a buffer, then by doubling the buffer size.
+    - When the headroom has stayed above `high_headroom` for `shrink_after`
+      seconds without an underrun, it shrinks one step in the reverse
+      order: first halving the buffer size, then removing a buffer.
+
+    This keeps latency low on machines that refill reliably and adds
+    headroom on loaded ones, without tuning values per platform. One
+    instance can be shared by many streams.
+    """
+    def __init__(self, min_buffers=2, max_buffers=8, min_buffer_size=4096, max_buffer_size=4096 * 16,
+                 low_headroom=0.05, high_headroom=0.25, shrink_after=5.0, cooldown=0.5):
+        """
+        Args:
+            min_buffers (int, optional): Fewest buffers to use. Defaults to 2.
+            max_buffers (int, optional): Most buffers to use. Defaults to 8.
+            min_buffer_size (int, optional): Smallest buffer size in bytes.
+                                             Defaults to 4096.
+            max_buffer_size (int, optional): Largest buffer size in bytes.
+                                             Defaults to 65536.
+            low_headroom (float, optional): Seconds of queued audio below
+                which the stream grows. Defaults to 0.05.
+            high_headroom (float, optional): Seconds of queued audio that must
+                be exceeded for the stream to shrink. Defaults to 0.25.
+            shrink_after (float, optional): Seconds of comfortable headroom
+                required before shrinking. Defaults to 5.
+            cooldown (float, optional): Seconds after a change during which
+                low headroom alone does not trigger another grow, so the
+                new buffers get a chance to fill. Underruns always grow.
+                Defaults to 0.5.
+        """
+        if not 1 <= min_buffers <= max_buffers:
+            raise ValueError("Require 1 <= min_buffers <= max_buffers.")
+        if not 0 < min_buffer_size <= max_buffer_size:
+            raise ValueError("Require 0 < min_buffer_size <= max_buffer_size.")
+        if low_headroom >= high_headroom:
+            raise ValueError("low_headroom must be smaller than high_headroom.")
+        self.min_buffers = min_buffers
+        self.max_buffers = max_buffers
+        self.min_buffer_size = min_buffer_size
+        self.max_buffer_size = max_buffer_size
+        self.low_headroom = low_headroom
+        self.high_headroom = high_headroom
+        self.shrink_after = shrink_after
+        self.cooldown = cooldown
+
+
+class _AdaptiveState:
+    """Per-stream measurements for an AdaptiveBuffering policy."""
+    def __init__(self, policy):
+        self.policy = policy
+        self.grows = 0
+        self.shrinks = 0
+        self.underruns = 0
+        self._reset_window(time.monotonic())
+        self._last_change = float('-inf')
+
+    def _reset_window(self, now):
+        self.window_start = now
+        self.min_headroom = float('inf')
+
+    def observe(self, headroom, underrun):
+        """
+        Records one update and decides whether to resize.
+
+        Args:
+            headroom (float or None): Queued seconds before the refill, or
+                                      None if the source is not playing.
+            underrun (bool): True if the source ran dry since the last update.
+
+        Returns:
+            int or None: GROW, SHRINK or None.
+        """
+        now = time.monotonic()
+        policy = self.policy
+        if underrun:
+            self.underruns += 1
+            return self._changed(now, GROW)
+        if headroom is None:
+            # Paused or not started: the measurements would be meaningless.
+            self._reset_window(now)
+            return None
+
+        if headroom < self.min_headroom:
+            self.min_headroom = headroom
+        if headroom < policy.low_headroom and now - self._last_change >= policy.cooldown:
+            return self._changed(now, GROW)
+        if now - self.window_start >= policy.shrink_after:
+            if self.min_headroom > policy.high_headroom:
+                return self._changed(now, SHRINK)
+            self._reset_window(now)
+        return None
+
+    def _changed(self, now, action):
+        self._last_change = now
+        self._reset_window(now)
+        return action
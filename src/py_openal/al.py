@@ -55,6 +55,14 @@ AL_FORMAT_STEREO_MULAW_EXT = 0x10015
 AL_FORMAT_MONO_ALAW_EXT = 0x10016
 AL_FORMAT_STEREO_ALAW_EXT = 0x10017
 
+# AL_EXT_IMA4
+AL_FORMAT_MONO_IMA4 = 0x1300
+AL_FORMAT_STEREO_IMA4 = 0x1301
+
+# AL_SOFT_MSADPCM
+AL_FORMAT_MONO_MSADPCM_SOFT = 0x1302
+AL_FORMAT_STEREO_MSADPCM_SOFT = 0x1303
+
 # AL_EXT_MCFORMATS - Multi-channel formats
 AL_FORMAT_QUAD8 = 0x1204
 AL_FORMAT_QUAD16 = 0x1205
@@ -179,6 +187,10 @@ AL_BYTE_LENGTH_SOFT = 0x2009
 AL_SAMPLE_LENGTH_SOFT = 0x200A
 AL_SEC_LENGTH_SOFT = 0x200B
 
+# AL_SOFT_block_alignment
+AL_UNPACK_BLOCK_ALIGNMENT_SOFT = 0x200C
+AL_PACK_BLOCK_ALIGNMENT_SOFT = 0x200D
+
 # AL_SOFT_source_latency
 AL_SAMPLE_OFFSET_LATENCY_SOFT = 0x1200 # <-- ADD THIS LINE
 AL_SEC_OFFSET_LATENCY_SOFT = 0x1201 # <-- ADD THIS LINE
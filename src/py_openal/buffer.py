@@ -3,11 +3,14 @@ import warnings
 from . import al
 from .enums import ChannelLayout, SampleType, AudioFormat, AmbisonicLayout, AmbisonicScaling
 from .exceptions import OalError
+from .helpers import samples_to_bytes
+from .memory import get_buffer_ledger
 
 class Buffer:
     """Represents an OpenAL buffer for storing audio data."""
 
-    def __init__(self, data_format: AudioFormat = None, data=None, size=None, frequency=None):
+    def __init__(self, data_format: AudioFormat = None, data=None, size=None, frequency=None, tag=None,
+                 block_alignment=None):
         """
         Creates an OpenAL buffer, optionally filling it with audio data.
 
@@ -15,20 +18,62 @@ class Buffer:
         empty buffer is created, which can be configured and filled later
         using methods like set_data() or set_data_samples().
 
+        The size of every upload is recorded in the current context's
+        BufferLedger (see `py_openal.memory`), under `tag`.
+
         Args:
             data_format (AudioFormat, optional): The format of the provided `data`.
             data (bytes, optional): The raw audio data bytes.
             size (int, optional): The size of the data in bytes.
             frequency (int, optional): The sample rate of the audio in Hz.
+            tag (str, optional): The memory accounting category of this buffer
+                                 (e.g., 'music', 'sfx'). Defaults to 'default'.
+            block_alignment (int, optional): Sample frames per block for
+                block-compressed formats (IMA4, MSADPCM), set before `data`
+                is uploaded. Requires the AL_SOFT_block_alignment extension.
+                Defaults to the format's standard alignment.
         """
         self._id = ctypes.c_uint()
         al.alGenBuffers(1, ctypes.pointer(self._id))
         self._id_value = self._id.value
+        self._tag = tag
+        self._ledger = None
 
         if data is not None:
             if data_format is None or size is None or frequency is None:
                 raise ValueError("data_format, size, and frequency must be provided if data is given.")
+            try:
+                ledger = self._reserve(size)
+            except OalError:
+                # Don't leak the AL buffer name when the budget refuses the upload.
+                self.destroy()
+                raise
+            if block_alignment is not None:
+                al.alBufferi(self._id, al.AL_UNPACK_BLOCK_ALIGNMENT_SOFT, int(block_alignment))
             al.alBufferData(self._id, data_format, data, size, frequency)
+            self._record(ledger, size)
+
+    def _reserve(self, size):
+        """Checks the context's memory budget before uploading `size` bytes."""
+        ledger = self._ledger if self._ledger is not None else get_buffer_ledger()
+        ledger.ensure_capacity(self._id_value, size)
+        return ledger
+
+    def _record(self, ledger, size):
+        """Records a successful upload of `size` bytes in the ledger."""
+        ledger.record(self._id_value, size, self._tag)
+        self._ledger = ledger
+
+    @property
+    def tag(self):
+        """The memory accounting category of this buffer."""
+        return self._tag
+
+    @tag.setter
+    def tag(self, value):
+        self._tag = value
+        if self._ledger is not None and self._id_value is not None:
+            self._ledger.record(self._id_value, self._ledger.size_of(self._id_value), value)
 
     def set_data(self, data_format, data, size, frequency):
         """
@@ -45,7 +90,9 @@ class Buffer:
         """
         if self._id_value is None:
             raise OalError("Buffer has been destroyed.")
+        ledger = self._reserve(size)
         al.alBufferData(self._id, data_format, data, size, frequency)
+        self._record(ledger, size)
 
     def set_data_samples(self, samplerate: int, internal_format: AudioFormat, samples: bytes, channels: ChannelLayout, sample_type: SampleType):
         """
@@ -92,8 +139,16 @@ class Buffer:
             raise TypeError(f"Invalid channel layout provided: {channels}")
 
         num_sample_frames = len(samples) // (bytes_per_sample * num_channels)
-        
+
+        # The stored size depends on the internal format, not the source data.
+        try:
+            stored_size = samples_to_bytes(num_sample_frames, internal_format)
+        except ValueError:
+            stored_size = len(samples)
+
+        ledger = self._reserve(stored_size)
         al.alBufferSamplesSOFT(self._id, samplerate, internal_format, num_sample_frames, channels, sample_type, samples)
+        self._record(ledger, stored_size)
 
     def update_data(self, data_format: AudioFormat, data: bytes, offset: int):
         """
@@ -275,11 +330,38 @@ class Buffer:
             raise OalError("Buffer has been destroyed.")
         al.alBufferi(self._id, al.AL_UNPACK_AMBISONIC_ORDER_SOFT, int(value))
 
+    @property
+    def block_alignment(self) -> int:
+        """
+        The number of sample frames per block used when unpacking
+        block-compressed data (IMA4, MSADPCM). 0 means the format's default.
+        Requires the AL_SOFT_block_alignment extension.
+        """
+        return self._get_int_property(al.AL_UNPACK_BLOCK_ALIGNMENT_SOFT)
+
+    @block_alignment.setter
+    def block_alignment(self, value: int):
+        """
+        Sets the unpack block alignment for this buffer.
+
+        This must be set before calling set_data with block-compressed data
+        that does not use the format's default alignment.
+
+        Args:
+            value (int): Sample frames per block, or 0 for the default.
+        """
+        if self._id_value is None:
+            raise OalError("Buffer has been destroyed.")
+        al.alBufferi(self._id, al.AL_UNPACK_BLOCK_ALIGNMENT_SOFT, int(value))
+
     def destroy(self):
         """Releases the OpenAL buffer resource."""
         if self._id_value is not None:
             temp_id = (ctypes.c_uint * 1)(self._id_value)
             al.alDeleteBuffers(1, temp_id)
+            if self._ledger is not None:
+                self._ledger.release(self._id_value)
+                self._ledger = None
             self._id_value = None
 
     def __del__(self):
@@ -0,0 +1,258 @@
+import os
+import hashlib
+import threading
+from collections import namedtuple
+from . import alc
+
+# Bytes read at a time while hashing a file.
+_HASH_CHUNK_SIZE = 1 << 20
+
+# A snapshot of a cache's counters. `dedup_hits` counts hits where the file
+# was loaded under a different path than the cached copy. `bytes_saved` is the
+# buffer memory that separate buffers for every hit would have used.
+CacheStats = namedtuple('CacheStats', ['entries', 'idle_entries', 'cached_bytes', 'hits', 'misses',
+                                       'dedup_hits', 'bytes_saved', 'evictions'])
+
+class _CacheEntry:
+    __slots__ = ('key', 'buffer', 'size', 'refcount', 'paths', 'last_used')
+
+    def __init__(self, key, buffer, size, path):
+        self.key = key
+        self.buffer = buffer
+        self.size = size
+        self.refcount = 0
+        self.paths = {path}
+        self.last_used = 0
+
+
+class BufferCache:
+    """
+    Shares one Buffer between all loads of identical audio content.
+
+    Files are identified by a BLAKE2b hash of their bytes together with the
+    load options, so byte-identical copies under different paths map to the
+    same Buffer. Hashes are remembered per path and only recomputed when the
+    file's size or modification time changes.
+
+    Buffers are reference counted. When the last user releases a buffer it
+    stays cached as an idle entry, so the next load is free. Idle entries are
+    evicted (least recently used first) when the context's BufferLedger needs
+    room under its budget, or by calling `evict_idle()`.
+    """
+    def __init__(self, ledger=None):
+        """
+        Args:
+            ledger (BufferLedger, optional): The ledger to register the
+                idle-entry evictor with. Defaults to none.
+        """
+        self._entries = {}      # key -> _CacheEntry
+        self._by_buffer = {}    # buffer id -> _CacheEntry
+        self._fingerprints = {}  # abspath -> (size, mtime_ns, digest)
+        self._clock = 0
+        self._hits = 0
+        self._misses = 0
+        self._dedup_hits = 0
+        self._bytes_saved = 0
+        self._evictions = 0
+        self._dedup_callback = None
+        self._loading = {}      # key -> Event set when an in-flight load ends
+        self._lock = threading.RLock()
+        self._ledger = ledger
+        if ledger is not None:
+            ledger.add_evictor(self.evict_idle)
+
+    def fingerprint(self, filepath) -> bytes:
+        """
+        Returns the BLAKE2b digest of a file's contents.
+
+        Args:
+            filepath (str): Path to the file.
+
+        Returns:
+            bytes: A 16-byte digest.
+        """
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        with self._lock:
+            known = self._fingerprints.get(path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        value = digest.digest()
+        with self._lock:
+            self._fingerprints[path] = (stat.st_size, stat.st_mtime_ns, value)
+        return value
+
+    def set_dedup_callback(self, callback):
+        """
+        Registers a function to be called on every dedup hit.
+
+        Args:
+            callback (callable): A function accepting `(filepath, cached_path,
+                                 size)`, where `cached_path` is a path the
+                                 content was first loaded from. Pass None to
+                                 unregister.
+        """
+        if callback is not None and not callable(callback):
+            raise TypeError("The provided callback must be a callable function or None.")
+        self._dedup_callback = callback
+
+    def acquire(self, filepath, extension=None, resample=False, compress=None, block_alignment=None, tag=None):
+        """
+        Returns a shared Buffer for a file, loading it on the first request.
+
+        Every call must be balanced by a call to `release()`.
+
+        Args:
+            filepath (str): Path to the audio file.
+            extension (str, optional): File extension hint.
+            resample, compress, block_alignment: Load options, as for
+                `py_openal.open()`. They are part of the cache key.
+            tag (str, optional): Memory accounting tag used when the buffer is
+                                 created.
+
+        Returns:
+            Buffer: The shared buffer.
+        """
+        from .loaders import _load_buffer, _get_mixing_frequency
+
+        target_frequency = _get_mixing_frequency() if resample else None
+        key = (self.fingerprint(filepath), target_frequency, compress, block_alignment)
+        path = os.path.abspath(filepath)
+        callback = None
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._hits += 1
+                    self._bytes_saved += entry.size
+                    if path not in entry.paths:
+                        self._dedup_hits += 1
+                        entry.paths.add(path)
+                        callback = self._dedup_callback
+                        cached_path = next(iter(entry.paths - {path}))
+                    self._use(entry)
+                    break
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    self._misses += 1
+                    break
+            # Another thread is loading the same content; use its buffer.
+            loading.wait()
+
+        if entry is None:
+            # Decoding and uploading happen without the cache lock, since the
+            # upload may ask the ledger to evict, which takes the lock again.
+            try:
+                buf = _load_buffer(filepath, extension, resample, compress, block_alignment, tag)
+                size = self._ledger.size_of(buf.id) if self._ledger is not None else 0
+                entry = _CacheEntry(key, buf, size or buf.size, path)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._by_buffer[buf.id] = entry
+                    self._use(entry)
+            finally:
+                with self._lock:
+                    del self._loading[key]
+                loading.set()
+
+        if callback is not None:
+            callback(filepath, cached_path, entry.size)
+        return entry.buffer
+
+    def _use(self, entry):
+        # Called with the lock held.
+        entry.refcount += 1
+        self._clock += 1
+        entry.last_used = self._clock
+
+    def release(self, buffer):
+        """
+        Drops one reference to a shared buffer.
+
+        The buffer stays cached while idle, until it is evicted.
+
+        Args:
+            buffer (Buffer): A buffer returned by `acquire()`.
+        """
+        with self._lock:
+            entry = self._by_buffer.get(buffer.id)
+            if entry is None:
+                raise ValueError("Buffer is not managed by this cache.")
+            if entry.refcount <= 0:
+                raise ValueError("Buffer has been released more times than it was acquired.")
+            entry.refcount -= 1
+
+    def evict_idle(self, bytes_needed=None) -> int:
+        """
+        Destroys idle cached buffers, least recently used first.
+
+        Args:
+            bytes_needed (int, optional): Stop once this many bytes have been
+                                          freed. Defaults to evicting every
+                                          idle entry.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        freed = 0
+        with self._lock:
+            idle = sorted((e for e in self._entries.values() if e.refcount == 0), key=lambda e: e.last_used)
+            for entry in idle:
+                if bytes_needed is not None and freed >= bytes_needed:
+                    break
+                del self._entries[entry.key]
+                del self._by_buffer[entry.buffer.id]
+                entry.buffer.destroy()
+                freed += entry.size
+                self._evictions += 1
+        return freed
+
+    def clear(self):
+        """Evicts all idle entries and forgets remembered file hashes."""
+        with self._lock:
+            self.evict_idle()
+            self._fingerprints.clear()
+
+    def get_stats(self) -> CacheStats:
+        """Returns a snapshot of the cache's counters."""
+        with self._lock:
+            entries = self._entries.values()
+            return CacheStats(len(self._entries), sum(1 for e in entries if e.refcount == 0),
+                              sum(e.size for e in entries), self._hits, self._misses,
+                              self._dedup_hits, self._bytes_saved, self._evictions)
+
+    def reset_stats(self):
+        """Resets the hit, miss, dedup and eviction counters."""
+        with self._lock:
+            self._hits = self._misses = self._dedup_hits = self._bytes_saved = self._evictions = 0
+
+
+# Caches for raw context handles that have no Context object.
+_unmanaged_caches = {}
+
+def get_buffer_cache():
+    """
+    Returns the BufferCache of the current context.
+
+    Returns:
+        BufferCache: The cache used by `open(..., cache=True)`.
+    """
+    from .context import _context_registry
+    from .memory import get_buffer_ledger
+
+    handle = alc.alcGetCurrentContext()
+    context = _context_registry.get(handle)
+    if context is not None:
+        return context.buffer_cache
+
+    cache = _unmanaged_caches.get(handle)
+    if cache is None:
+        cache = _unmanaged_caches[handle] = BufferCache(get_buffer_ledger())
+    return cache
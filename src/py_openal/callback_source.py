@@ -1,9 +1,18 @@
 import ctypes
+import threading
+import time
 from . import al
 from .source import Source
 from .buffer import Buffer
 from .enums import AudioFormat
 from .exceptions import OalError
+from .helpers import get_format_info
+from .ring_buffer import RingBuffer
+from .telemetry import CallbackTelemetry
+from ._optional import _require_numpy
+
+# NumPy dtype names for the FormatInfo struct format characters.
+_NUMPY_DTYPES = {'B': 'uint8', 'h': 'int16', 'f': 'float32'}
 
 class CallbackSource(Source):
     """
@@ -12,8 +21,26 @@ class CallbackSource(Source):
     This source uses a single, special OpenAL buffer that is filled via a
     user-provided Python callback function whenever OpenAL needs more audio
     data. This is highly efficient for procedural audio or custom decoders.
+
+    In ring-buffer mode (no callback, a `ring_size` instead), producers on
+    any thread `write()` PCM into a preallocated RingBuffer and the OpenAL
+    callback only copies the available bytes out: it runs no user code,
+    takes no locks and allocates no buffers. ctypes still has to take the GIL to enter the
+    callback, so a thread holding the GIL for long can delay the mixer, but
+    the callback itself holds it only for one `memmove`. If the ring runs
+    short, the rest of the block is silence and an underrun is counted.
+
+    With `view='numpy'` or `view='memoryview'` the callback fills OpenAL's
+    buffer in place: it receives a writable array over the buffer, typed
+    from the AudioFormat and shaped (frames, channels), so vectorized code
+    writes its output straight into it.
+
+    Every callback is timed in `callback_telemetry`. That adds two
+    `time.perf_counter()` calls and a few float operations to each call,
+    about a microsecond, and with histograms enabled two bisections into
+    fixed buckets. None of it takes a lock.
     """
-    def __init__(self, callback, audio_format: AudioFormat, frequency: int):
+    def __init__(self, callback, audio_format: AudioFormat, frequency: int, ring_size=None, view=None):
         """
         Creates a source that gets its audio data from a callback.
 
@@ -27,12 +54,57 @@ class CallbackSource(Source):
             audio_format (AudioFormat): The format of the audio data that the
                 callback will provide.
             frequency (int): The sample rate of the audio data.
+            ring_size (int, optional): If given, `callback` must be None and
+                the source plays from a ring buffer of this many bytes
+                (rounded down to whole sample frames), filled with `write()`.
+            view (str, optional): 'numpy' or 'memoryview' to use a fill
+                callback instead. It is called as `callback(out, user_param)`,
+                where `out` is a writable NumPy array or memoryview of shape
+                (frames, channels) over OpenAL's buffer, and returns the
+                number of frames written, or None if it filled all of them.
+                Fewer frames than requested ends the stream. Defaults to
+                None (the callback returns bytes).
         """
-        if not callable(callback):
+        if view not in (None, 'numpy', 'memoryview'):
+            raise ValueError("view must be None, 'numpy' or 'memoryview'.")
+        self._view_kind = view
+        self._last_view = None
+        if view is not None:
+            if ring_size is not None:
+                raise TypeError("A ring-buffer CallbackSource cannot use a fill callback.")
+            info = get_format_info(audio_format)
+            self._channels = info.channels
+            self._frame_size = info.channels * info.bytes_per_sample
+            self._struct_format = info.struct_format
+            self._np = None
+            if view == 'numpy':
+                self._np = _require_numpy("view='numpy'")
+
+        if ring_size is not None:
+            if callback is not None:
+                raise TypeError("A ring-buffer CallbackSource takes no callback.")
+            info = get_format_info(audio_format)
+            frame_size = info.channels * info.bytes_per_sample
+            self.ring = RingBuffer(max(frame_size, ring_size - ring_size % frame_size))
+            self._silence = 0x80 if info.bits == 8 else 0
+            # Serializes producers; the ring itself is single-producer.
+            self._write_lock = threading.Lock()
+        elif not callable(callback):
             raise TypeError("The provided callback must be a callable function.")
+        else:
+            self.ring = None
 
         super().__init__()
         self._user_callback = callback
+
+        # Timing of every call into _c_callback_entry. The bytes per second
+        # give the period used for the GIL wait estimate.
+        self.callback_telemetry = CallbackTelemetry(f"CallbackSource {self._id_value}")
+        try:
+            info = get_format_info(audio_format)
+            self._bytes_per_second = info.channels * info.bytes_per_sample * frequency
+        except ValueError:
+            self._bytes_per_second = None
         
         # This is the internal handler that conforms to the C function signature.
         # It MUST be stored as an instance variable to prevent it from being
@@ -57,7 +129,23 @@ class CallbackSource(Source):
         This is the entry point called directly from the C OpenAL library.
         It retrieves the requested data from the user's Python callback and
         copies it into the buffer provided by OpenAL.
+
+        Every call is timed in `callback_telemetry`.
         """
+        start = time.perf_counter()
+        count = self._fill(data_ptr, num_bytes)
+        bytes_per_second = self._bytes_per_second
+        self.callback_telemetry.record_call(start, time.perf_counter(), count, num_bytes,
+                                            num_bytes / bytes_per_second if bytes_per_second else None)
+        return count
+
+    def _fill(self, data_ptr, num_bytes):
+        """Fills OpenAL's buffer and returns the number of bytes provided."""
+        ring = self.ring
+        if ring is not None:
+            return ring.read_into_padded(data_ptr, num_bytes, self._silence)
+        if self._view_kind is not None:
+            return self._fill_view(data_ptr, num_bytes)
         try:
             # Call the user's Python function to get the available audio data.
             # The user function can return less than num_bytes.
@@ -77,9 +165,79 @@ class CallbackSource(Source):
             # Return the ACTUAL number of bytes we copied.
             return bytes_to_copy
         except Exception as e:
+            self.callback_telemetry.record_exception(e)
             print(f"Exception in audio callback: {e}")
             return 0
 
+    def _get_view(self, data_ptr, num_bytes):
+        """
+        Returns the array over OpenAL's buffer. OpenAL usually passes the
+        same buffer every time, so the last array is reused when it matches.
+        """
+        last = self._last_view
+        if last is not None and last[0] == data_ptr and last[1] == num_bytes:
+            return last[2]
+        frames = num_bytes // self._frame_size
+        raw = (ctypes.c_char * (frames * self._frame_size)).from_address(data_ptr)
+        if self._np is not None:
+            np = self._np
+            view = np.frombuffer(raw, dtype=_NUMPY_DTYPES[self._struct_format]).reshape(frames, self._channels)
+        else:
+            view = memoryview(raw).cast('B').cast(self._struct_format, (frames, self._channels))
+        self._last_view = (data_ptr, num_bytes, view)
+        return view
+
+    def _fill_view(self, data_ptr, num_bytes):
+        try:
+            out = self._get_view(data_ptr, num_bytes)
+            frames = self._user_callback(out, None)
+            if frames is None:
+                return len(out) * self._frame_size
+            return min(max(int(frames), 0), len(out)) * self._frame_size
+        except Exception as e:
+            self.callback_telemetry.record_exception(e)
+            print(f"Exception in audio callback: {e}")
+            return 0
+
+    def write(self, data, timeout=None) -> bool:
+        """
+        Writes PCM data into the ring, waiting while it is full. Ring-buffer
+        mode only. Safe to call from any thread.
+
+        Args:
+            data (bytes-like): Whole sample frames in the source's format.
+            timeout (float, optional): Maximum seconds to wait for space.
+
+        Returns:
+            bool: True if all of `data` was written, False on timeout or
+                  after `finish()`.
+        """
+        if self.ring is None:
+            raise OalError("write() needs a CallbackSource created with a ring_size.")
+        with self._write_lock:
+            return self.ring.write(data, timeout)
+
+    def finish(self):
+        """
+        Marks the end of the written data. Once the ring has been played
+        out, the source stops instead of playing silence. Ring-buffer mode only.
+        """
+        if self.ring is None:
+            raise OalError("finish() needs a CallbackSource created with a ring_size.")
+        self.ring.finish()
+
+    @property
+    def fill_level(self) -> float:
+        """The fraction of the ring holding unplayed data, from 0 to 1."""
+        return self.ring.fill_level if self.ring is not None else 0.0
+
+    def get_ring_stats(self):
+        """
+        Returns the ring's fill level and counters (including underruns) as
+        a RingStats, or None if the source is not in ring-buffer mode.
+        """
+        return self.ring.get_stats() if self.ring is not None else None
+
     def destroy(self):
         """
         Stops playback and releases all OpenAL resources, including the
@@ -92,3 +250,8 @@ class CallbackSource(Source):
         if self._callback_buffer:
             self._callback_buffer.destroy()
             self._callback_buffer = None
+
+        if self.ring is not None:
+            # Wake producers blocked in write().
+            self.ring.close()
+        self.callback_telemetry.unregister()
@@ -0,0 +1,148 @@
+import threading
+import time
+from .callback_source import CallbackSource
+from .stream import _channels_to_al_format, _LoopingReader
+from .enums import PlaybackState
+from .telemetry import StreamTelemetry
+from .exceptions import OalError
+
+class CallbackStream(CallbackSource):
+    """
+    A streaming source that OpenAL pulls from through AL_SOFT_callback_buffer.
+
+    A decoder thread keeps the ring of a ring-buffer CallbackSource full,
+    and the mixer copies out of it in the buffer callback. There is no
+    buffer queue to maintain and nothing needs polling, so the delay between
+    decoding and playback is at most the ring size. `update()` is kept so a CallbackStream can be used
+    wherever a SourceStream is, including with a StreamManager; it only
+    reports underruns to the telemetry and whether the stream has finished.
+
+    If the decoder falls behind, the callback plays silence for the missing
+    part instead of returning short, which OpenAL Soft would take as the end
+    of the stream. `get_ring_stats()` reports the fill level and underruns.
+    """
+    def __init__(self, audio_file, ring_size=4096 * 24, chunk_size=4096 * 8, loop=False, loop_start=0,
+                 loop_end=None, prefill_timeout=5.0):
+        """
+        Args:
+            audio_file: A stream decoder, as for SourceStream.
+            ring_size (int, optional): Size of the ring buffer in bytes. This
+                is the most audio decoded ahead of playback. Defaults to 98304.
+            chunk_size (int, optional): Bytes decoded at a time by the
+                decoder thread. Defaults to 32768.
+            loop (bool, optional): Loop the stream instead of finishing.
+                                   Defaults to False.
+            loop_start (int, optional): See SourceStream. Defaults to 0.
+            loop_end (int, optional): See SourceStream. Defaults to the end.
+            prefill_timeout (float, optional): Longest wait, in seconds, for
+                the decoder to fill the ring before playback may start.
+                Defaults to 5.0.
+
+        Raises:
+            OalError: If the decoder fails while filling the ring.
+        """
+        bits = getattr(audio_file, 'bit_depth', 16)
+        self.al_format = _channels_to_al_format(audio_file.channels, bits)
+        self._frame_size = audio_file.channels * (bits // 8)
+        self.telemetry = StreamTelemetry()
+        if loop:
+            audio_file = _LoopingReader(audio_file, loop_start, loop_end)
+        self.audio_file = audio_file
+        self.chunk_size = self._align_size(chunk_size)
+        # The mixer thread only counts underruns in the ring; update() passes
+        # them on to the telemetry and its underrun callback.
+        self._underruns_reported = 0
+        # An exception raised by the decoder thread, raised again by update().
+        self._decode_error = None
+        self._error_reported = False
+
+        super().__init__(None, self.al_format, audio_file.frequency, ring_size=max(ring_size, self.chunk_size))
+
+        self._stopping = False
+        self._decode_thread = threading.Thread(target=self._decode_loop, name="py_openal-CallbackStream",
+                                               daemon=True)
+        self._decode_thread.start()
+        # Start playback with a full ring.
+        self.ring.wait_for_data(self.ring.capacity, prefill_timeout)
+        if self._decode_error is not None:
+            error = self._decode_error
+            self.destroy()
+            raise OalError(f"The decoder failed while filling the stream: {error}") from error
+
+    def _align_size(self, size):
+        """Rounds a byte size down to whole sample frames."""
+        return max(self._frame_size, size - size % self._frame_size)
+
+    @property
+    def ring_size(self) -> int:
+        """The capacity of the ring buffer in bytes."""
+        return self.ring.capacity
+
+    @property
+    def queued_duration(self) -> float:
+        """The seconds of decoded audio waiting in the ring buffer."""
+        return self.ring.available / self._frame_size / self.audio_file.frequency
+
+    def _decode_loop(self):
+        ring = self.ring
+        try:
+            while not self._stopping:
+                start = time.perf_counter()
+                data = self.audio_file.get_buffer(self.chunk_size)
+                self.telemetry.decode_time.record(time.perf_counter() - start)
+                if not data:
+                    break
+                if not ring.write(data):
+                    break
+                self.telemetry.record_refill(len(data))
+        except Exception as e:
+            self._decode_error = e
+            self.telemetry.record_error(e)
+        finally:
+            # Lets the source play out what was decoded and then stop,
+            # instead of padding with silence forever.
+            ring.finish()
+
+    def _report_underruns(self):
+        pending = self.ring.underruns
+        while self._underruns_reported < pending:
+            self._underruns_reported += 1
+            self.telemetry.record_underrun(self)
+
+    def update(self):
+        """
+        Reports underruns to the telemetry.
+
+        Returns:
+            True if the stream is still active, False once all of the audio
+            has been played.
+
+        Raises:
+            OalError: Once, if the decoder thread failed. The audio decoded
+                before the failure still plays out.
+        """
+        if self._id_value is None:
+            return False
+        self._report_underruns()
+        if self._decode_error is not None and not self._error_reported:
+            self._error_reported = True
+            raise OalError(f"The stream's decoder failed: {self._decode_error}") from self._decode_error
+        if self.ring.drained and self.state == PlaybackState.STOPPED:
+            return False
+        return True
+
+    def destroy(self):
+        """Stops the stream, ends the decoder thread and releases all resources."""
+        if self._id_value is not None:
+            # Destroying the source first guarantees the mixer no longer reads the ring.
+            super().destroy()
+            self._stopping = True
+            if self._decode_thread is not threading.current_thread():
+                self._decode_thread.join()
+            close = getattr(self.audio_file, 'close', None)
+            if close is not None:
+                close()
+            self._report_underruns()
+            self.telemetry.retire()
+        else:
+            super().destroy()
@@ -0,0 +1,324 @@
+import threading
+from collections import namedtuple
+from . import al
+from .enums import AudioFormat
+from .exceptions import OalError
+from .helpers import get_format_info
+from ._optional import _require_numpy
+
+# Compressed formats OpenAL Soft can store in a buffer and decode in the
+# mixer. Each entry is (extension, mono format, stereo format, default block
+# alignment in sample frames, or None for sample-based formats).
+_CODECS = {
+    'mulaw': (b"AL_EXT_MULAW", AudioFormat.MONO_MULAW, AudioFormat.STEREO_MULAW, None),
+    'alaw': (b"AL_EXT_ALAW", AudioFormat.MONO_ALAW, AudioFormat.STEREO_ALAW, None),
+    'ima4': (b"AL_EXT_IMA4", AudioFormat.MONO_IMA4, AudioFormat.STEREO_IMA4, 65),
+    'msadpcm': (b"AL_SOFT_MSADPCM", AudioFormat.MONO_MSADPCM, AudioFormat.STEREO_MSADPCM, 64),
+}
+
+COMPRESSIONS = tuple(_CODECS)
+
+# Running totals of everything encoded in this process.
+CompressionStats = namedtuple('CompressionStats', ['clips', 'pcm_bytes', 'compressed_bytes', 'saved_bytes'])
+
+_stats_lock = threading.Lock()
+_stats = [0, 0, 0]
+
+
+class CompressedData(namedtuple('CompressedData', ['format', 'data', 'block_alignment', 'pcm_size'])):
+    """
+    The result of `compress_pcm()`.
+
+    `block_alignment` is the block size in sample frames when it differs from
+    the format's default, and None otherwise (so no AL_SOFT_block_alignment
+    call is needed). `pcm_size` is the size of the PCM data that was encoded.
+    """
+    __slots__ = ()
+
+    @property
+    def saved_bytes(self) -> int:
+        """Bytes of buffer memory saved compared to uploading the PCM data."""
+        return self.pcm_size - len(self.data)
+
+    @property
+    def ratio(self) -> float:
+        """The PCM size divided by the compressed size."""
+        return self.pcm_size / len(self.data) if self.data else 0.0
+
+
+def get_compression_stats() -> CompressionStats:
+    """Returns how much PCM data has been compressed and how many bytes it saved."""
+    with _stats_lock:
+        clips, pcm_bytes, compressed_bytes = _stats
+    return CompressionStats(clips, pcm_bytes, compressed_bytes, pcm_bytes - compressed_bytes)
+
+def reset_compression_stats():
+    """Resets the counters returned by `get_compression_stats()`."""
+    with _stats_lock:
+        _stats[:] = [0, 0, 0]
+
+def _get_codec(compression):
+    try:
+        return _CODECS[compression]
+    except KeyError:
+        raise ValueError(f"Unknown compression: {compression!r}. Use one of {', '.join(COMPRESSIONS)}.")
+
+def _check_block_alignment(compression, block_alignment):
+    """Validates a block alignment against the constraints of the codec."""
+    if block_alignment < 2:
+        raise ValueError("block_alignment must be at least 2 sample frames.")
+    if compression == 'ima4' and (block_alignment - 1) % 8:
+        raise ValueError("IMA4 block_alignment must be 1 plus a multiple of 8 (e.g., 65).")
+    if compression == 'msadpcm' and block_alignment % 2:
+        raise ValueError("MSADPCM block_alignment must be even (e.g., 64).")
+
+def check_compression_support(compression, block_alignment=None):
+    """
+    Checks that the current context can store a compressed format.
+
+    Args:
+        compression (str): One of 'mulaw', 'alaw', 'ima4' or 'msadpcm'.
+        block_alignment (int, optional): A non-default block size, which
+                                         also requires AL_SOFT_block_alignment.
+
+    Raises:
+        OalError: If a required extension is not present.
+    """
+    extension = _get_codec(compression)[0]
+    if not al.alIsExtensionPresent(extension):
+        raise OalError(f"'{compression}' buffers require the {extension.decode()} extension, "
+                       "which is not supported by this OpenAL implementation.")
+    if block_alignment is not None and not al.alIsExtensionPresent(b"AL_SOFT_block_alignment"):
+        raise OalError("Custom block alignments require the AL_SOFT_block_alignment extension.")
+
+def _to_int16(np, data, info):
+    """Converts interleaved PCM bytes to an int32 (frames, channels) array of 16-bit values."""
+    if info.struct_format == 'h':
+        samples = np.frombuffer(data, dtype='<i2').astype(np.int32)
+    elif info.struct_format == 'B':
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.int32) - 128) << 8
+    else:
+        samples = np.frombuffer(data, dtype='<f4')
+        samples = np.clip(np.rint(samples * 32768.0), -32768, 32767).astype(np.int32)
+    frames = len(samples) // info.channels
+    return samples[:frames * info.channels].reshape(frames, info.channels)
+
+
+# G.711 segment end points, after the 16-bit input is scaled to 14 (mu-law)
+# or 13 (A-law) bits.
+_SEG_UEND = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+_SEG_AEND = (0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF)
+
+def _encode_mulaw(np, pcm):
+    x = pcm >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    x = np.minimum(np.abs(x), 8159) + 0x21
+    seg = np.searchsorted(np.array(_SEG_UEND), x)
+    value = np.where(seg >= 8, 0x7F, (seg << 4) | ((x >> (seg + 1)) & 0xF))
+    return (value ^ mask).astype(np.uint8).tobytes()
+
+def _encode_alaw(np, pcm):
+    x = pcm >> 3
+    negative = x < 0
+    mask = np.where(negative, 0x55, 0xD5)
+    x = np.where(negative, -x - 1, x)
+    seg = np.searchsorted(np.array(_SEG_AEND), x)
+    # Segments 0 and 1 share the same step size.
+    value = (seg << 4) | ((x >> np.maximum(seg, 1)) & 0xF)
+    return (value ^ mask).astype(np.uint8).tobytes()
+
+
+_IMA4_STEPS = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+)
+_IMA4_INDEX_ADJUST = (-1, -1, -1, -1, 2, 4, 6, 8)
+
+def _encode_ima4(np, pcm, block_alignment):
+    """
+    Encodes IMA4 blocks in the WAV layout OpenAL Soft expects.
+
+    Each block holds, per channel, a 4-byte header (the first sample and the
+    step index), followed by the remaining samples as 4-bit codes. Codes are
+    grouped in runs of 8 samples (4 bytes) per channel, low nibble first.
+    """
+    frames, channels = pcm.shape
+    blocks = -(-frames // block_alignment)
+    pcm = np.pad(pcm, ((0, blocks * block_alignment - frames), (0, 0)))
+    blocked = pcm.reshape(blocks, block_alignment, channels)
+    per_block = block_alignment - 1
+
+    headers = np.zeros((blocks, channels, 4), dtype=np.uint8)
+    codes = np.empty((channels, blocks, per_block), dtype=np.uint8)
+    steps = _IMA4_STEPS
+    for c in range(channels):
+        index = 0
+        channel_samples = blocked[:, :, c].tolist()
+        channel_codes = bytearray(blocks * per_block)
+        out = 0
+        for b, block in enumerate(channel_samples):
+            sample = block[0]
+            headers[b, c, 0] = sample & 0xFF
+            headers[b, c, 1] = (sample >> 8) & 0xFF
+            headers[b, c, 2] = index
+            for target in block[1:]:
+                step = steps[index]
+                diff = target - sample
+                if diff < 0:
+                    magnitude = min(7, (-diff * 4) // step)
+                    sample -= ((2 * magnitude + 1) * step) >> 3
+                    if sample < -32768:
+                        sample = -32768
+                    channel_codes[out] = 8 | magnitude
+                else:
+                    magnitude = min(7, (diff * 4) // step)
+                    sample += ((2 * magnitude + 1) * step) >> 3
+                    if sample > 32767:
+                        sample = 32767
+                    channel_codes[out] = magnitude
+                out += 1
+                index += _IMA4_INDEX_ADJUST[magnitude]
+                if index < 0:
+                    index = 0
+                elif index > 88:
+                    index = 88
+        codes[c] = np.frombuffer(channel_codes, dtype=np.uint8).reshape(blocks, per_block)
+
+    packed = codes[:, :, 0::2] | (codes[:, :, 1::2] << 4)
+    # (channel, block, group, 4 bytes) -> (block, group, channel, 4 bytes)
+    packed = packed.reshape(channels, blocks, per_block // 8, 4).transpose(1, 2, 0, 3)
+    return np.concatenate((headers.reshape(blocks, -1), packed.reshape(blocks, -1)), axis=1).tobytes()
+
+
+_MSADPCM_ADAPTATION = (230, 230, 230, 230, 307, 409, 512, 614, 768, 614, 512, 409, 307, 230, 230, 230)
+_MSADPCM_COEFFICIENTS = ((256, 0), (512, -256), (0, 0), (192, 64), (240, 0), (460, -208), (392, -232))
+
+def _encode_msadpcm(np, pcm, block_alignment):
+    """
+    Encodes MSADPCM blocks in the WAV layout OpenAL Soft expects.
+
+    Each block starts with the per-channel predictor indices, initial deltas
+    and the two history samples, followed by 4-bit codes interleaved across
+    channels, high nibble first. The predictor for each block and channel is
+    the one with the smallest prediction error on the source samples.
+    """
+    frames, channels = pcm.shape
+    blocks = -(-frames // block_alignment)
+    pcm = np.pad(pcm, ((0, blocks * block_alignment - frames), (0, 0)))
+    blocked = pcm.reshape(blocks, block_alignment, channels)
+
+    best_error = np.full((blocks, channels), np.inf)
+    predictors = np.zeros((blocks, channels), dtype=np.int64)
+    for i, (c1, c2) in enumerate(_MSADPCM_COEFFICIENTS):
+        residual = blocked[:, 2:] - ((blocked[:, 1:-1] * c1 + blocked[:, :-2] * c2) >> 8)
+        error = np.abs(residual).mean(axis=1)
+        better = error < best_error
+        best_error = np.where(better, error, best_error)
+        predictors = np.where(better, i, predictors)
+    initial_delta = np.clip(best_error // 2, 16, 32767).astype(np.int64)
+
+    per_block = block_alignment - 2
+    codes = np.empty((blocks, per_block, channels), dtype=np.uint8)
+    for c in range(channels):
+        channel_samples = blocked[:, :, c].tolist()
+        channel_predictors = predictors[:, c].tolist()
+        channel_deltas = initial_delta[:, c].tolist()
+        channel_codes = bytearray(blocks * per_block)
+        out = 0
+        for b, block in enumerate(channel_samples):
+            c1, c2 = _MSADPCM_COEFFICIENTS[channel_predictors[b]]
+            delta = channel_deltas[b]
+            s2, s1 = block[0], block[1]
+            for target in block[2:]:
+                prediction = s1 * c1 + s2 * c2
+                # The decoder divides with truncation toward zero.
+                prediction = prediction >> 8 if prediction >= 0 else -((-prediction) >> 8)
+                diff = target - prediction
+                if diff >= 0:
+                    code = min(7, (diff + (delta >> 1)) // delta)
+                else:
+                    code = max(-8, -((-diff + (delta >> 1)) // delta))
+                sample = prediction + code * delta
+                if sample > 32767:
+                    sample = 32767
+                elif sample < -32768:
+                    sample = -32768
+                s2, s1 = s1, sample
+                code &= 0xF
+                channel_codes[out] = code
+                out += 1
+                delta = (_MSADPCM_ADAPTATION[code] * delta) >> 8
+                if delta < 16:
+                    delta = 16
+        codes[:, :, c] = np.frombuffer(channel_codes, dtype=np.uint8).reshape(blocks, per_block)
+
+    nibbles = codes.reshape(blocks, -1)
+    packed = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+    header = np.concatenate((
+        predictors.astype(np.uint8),
+        initial_delta.astype('<i2').view(np.uint8).reshape(blocks, -1),
+        blocked[:, 1].astype('<i2').view(np.uint8).reshape(blocks, -1),
+        blocked[:, 0].astype('<i2').view(np.uint8).reshape(blocks, -1),
+    ), axis=1)
+    return np.concatenate((header, packed), axis=1).tobytes()
+
+
+def compress_pcm(data: bytes, audio_format: AudioFormat, compression: str,
+                 block_alignment: int = None) -> CompressedData:
+    """
+    Encodes PCM data into a compressed format OpenAL can store natively.
+
+    The compressed data is uploaded as is and decoded by the mixer, so a
+    resident buffer takes 2x (mu-law, A-law) to about 4x (IMA4, MSADPCM)
+    less memory than 16-bit PCM. Encoding happens once, at load or build
+    time. The ADPCM encoders run a per-sample loop, so prefer compressing
+    large banks ahead of time with `build_sound_bank()`. Requires NumPy.
+
+    Args:
+        data (bytes): The raw audio data (8-bit, 16-bit or float32; mono or stereo).
+        audio_format (AudioFormat): The format of `data`.
+        compression (str): One of 'mulaw', 'alaw', 'ima4' or 'msadpcm'.
+        block_alignment (int, optional): Sample frames per ADPCM block. The
+            defaults are 65 for IMA4 and 64 for MSADPCM. Other values need
+            the AL_SOFT_block_alignment extension. The last block is padded
+            with silence.
+
+    Returns:
+        CompressedData: The compressed format, data and sizes.
+    """
+    _, mono_format, stereo_format, default_alignment = _get_codec(compression)
+    info = get_format_info(audio_format)
+    if info.channels not in (1, 2):
+        raise OalError(f"'{compression}' compression only supports mono and stereo audio.")
+    if default_alignment is None:
+        if block_alignment is not None:
+            raise ValueError(f"'{compression}' is not a block-based format.")
+    elif block_alignment is not None:
+        _check_block_alignment(compression, block_alignment)
+        if block_alignment == default_alignment:
+            block_alignment = None
+
+    np = _require_numpy('Compressing audio')
+    pcm = _to_int16(np, data, info)
+
+    if compression == 'mulaw':
+        encoded = _encode_mulaw(np, pcm)
+    elif compression == 'alaw':
+        encoded = _encode_alaw(np, pcm)
+    elif compression == 'ima4':
+        encoded = _encode_ima4(np, pcm, block_alignment or default_alignment)
+    else:
+        encoded = _encode_msadpcm(np, pcm, block_alignment or default_alignment)
+
+    pcm_size = len(data)
+    with _stats_lock:
+        _stats[0] += 1
+        _stats[1] += pcm_size
+        _stats[2] += len(encoded)
+
+    return CompressedData(mono_format if info.channels == 1 else stereo_format, encoded, block_alignment, pcm_size)
@@ -3,6 +3,8 @@ import weakref
 from . import alc
 from .exceptions import OalError
 from .listener import Listener
+from .memory import BufferLedger
+from .cache import BufferCache
 from ._internal import _ensure_context, _default_device
 from enum import IntEnum
 from .enums import EffectType, FilterType
@@ -96,6 +98,8 @@ class Context:
         self._device_obj = device        
         self._as_parameter_ = self._context
         self._listener = Listener()
+        self._buffer_ledger = BufferLedger()
+        self._buffer_cache = None
         _context_registry[self._context] = self
 
     @property
@@ -108,6 +112,26 @@ class Context:
         """The parent Device object this context was created on."""
         return self._device_obj
 
+    @property
+    def buffer_ledger(self):
+        """
+        The BufferLedger tracking buffer memory in this context.
+
+        Set `context.buffer_ledger.budget` to a byte count to enforce a
+        memory budget for buffer uploads.
+        """
+        return self._buffer_ledger
+
+    @property
+    def buffer_cache(self):
+        """
+        The BufferCache that shares buffers of identical content in this
+        context. Created on first use.
+        """
+        if self._buffer_cache is None:
+            self._buffer_cache = BufferCache(self._buffer_ledger)
+        return self._buffer_cache
+
     def create_source(self, content=None, streaming=False):
         """
         Creates a Source, optionally loading content for it.
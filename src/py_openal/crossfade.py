@@ -0,0 +1,233 @@
+import math
+import threading
+import time
+from . import al
+from . import alc
+from .source import Source
+from .helpers import seconds_to_nanoseconds
+
+def _current_device():
+    """The Device of the current context, or None."""
+    from . import _internal
+    from .context import _context_registry
+    _internal._ensure_context()
+    context = _context_registry.get(alc.alcGetCurrentContext())
+    return context.device if context is not None else _internal._default_device
+
+class _Fade:
+    """One stream's gain ramp."""
+    __slots__ = ('stream', 'start_gain', 'end_gain', 'start', 'duration')
+
+    def __init__(self, stream, start_gain, end_gain, start, duration):
+        self.stream = stream
+        self.start_gain = start_gain
+        self.end_gain = end_gain
+        self.start = start
+        self.duration = duration
+
+    def gain_at(self, now):
+        """Returns the gain at `now` and whether the ramp is complete."""
+        if self.duration <= 0:
+            return self.end_gain, True
+        progress = min(max((now - self.start) / self.duration, 0.0), 1.0)
+        # Equal-power: the summed power of both streams stays constant.
+        if self.end_gain >= self.start_gain:
+            weight = math.sin(progress * math.pi / 2)
+        else:
+            weight = 1.0 - math.cos(progress * math.pi / 2)
+        return self.start_gain + (self.end_gain - self.start_gain) * weight, progress >= 1.0
+
+class Crossfader:
+    """
+    Crossfades music from one stream to the next.
+
+    The incoming stream is created ahead of time with `prepare()`, which
+    fills its buffers while the current stream keeps playing. It is then
+    started at a device clock time a little in the future with
+    `play_at_time`, so the start does not depend on when this thread runs,
+    and both gains are ramped with equal-power curves on a scheduler thread.
+    The outgoing stream is destroyed when its fade-out completes.
+
+    Streams are refilled by a StreamManager unless `manager` is None, in
+    which case the application calls `update()` on `current` and on the
+    fading streams itself.
+    """
+    def __init__(self, device=None, manager=True, start_delay=0.05, period=0.01):
+        """
+        Args:
+            device (Device, optional): The device whose clock schedules
+                starts. Defaults to the current context's device.
+            manager (bool or StreamManager, optional): The manager that
+                refills the streams. True uses the shared StreamManager.
+                Defaults to True.
+            start_delay (float, optional): Seconds between `crossfade_to()`
+                and the scheduled start. It must cover the time to make the
+                call into OpenAL. Defaults to 0.05.
+            period (float, optional): Seconds between gain updates.
+                Defaults to 0.01.
+        """
+        if period <= 0:
+            raise ValueError("period must be positive.")
+        if manager is True:
+            from .stream_manager import get_stream_manager
+            manager = get_stream_manager()
+        self.manager = manager or None
+        self.device = device if device is not None else _current_device()
+        self.start_delay = start_delay
+        self.period = period
+        self._current = None
+        self._prepared = None
+        self._fades = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self):
+        """The stream being faded in or playing, or None."""
+        return self._current
+
+    @property
+    def fading(self) -> bool:
+        """True while any gain ramp is in progress."""
+        with self._lock:
+            return bool(self._fades)
+
+    def prepare(self, source, **stream_kwargs):
+        """
+        Creates the next stream ahead of time, with its buffers filled.
+
+        Args:
+            source: A stream that has not been started, or anything accepted
+                    by `py_openal.stream()`.
+            **stream_kwargs: Passed to `py_openal.stream()`.
+
+        Returns:
+            The prepared stream. It is silent until `crossfade_to()`. A
+            stream prepared earlier and not used yet is destroyed.
+        """
+        if isinstance(source, Source):
+            stream = source
+        else:
+            from .loaders import stream as open_stream
+            stream = open_stream(source, **stream_kwargs)
+        stream.gain = 0.0
+        if self.manager is not None and stream not in self.manager:
+            self.manager.add(stream)
+        with self._lock:
+            previous, self._prepared = self._prepared, stream
+        if previous is not None and previous is not stream:
+            previous.destroy()
+        return stream
+
+    def crossfade_to(self, source=None, duration=2.0, gain=1.0, **stream_kwargs):
+        """
+        Fades from the current stream to another.
+
+        Args:
+            source (optional): The incoming stream or anything accepted by
+                `py_openal.stream()`. Defaults to the stream from the last
+                `prepare()` call.
+            duration (float, optional): Length of the crossfade in seconds.
+                0 cuts. Defaults to 2.0.
+            gain (float, optional): The incoming stream's final gain.
+                                    Defaults to 1.0.
+            **stream_kwargs: Passed to `py_openal.stream()`.
+
+        Returns:
+            The incoming stream.
+        """
+        if source is None:
+            with self._lock:
+                incoming, self._prepared = self._prepared, None
+            if incoming is None:
+                raise ValueError("No stream given and none prepared.")
+        elif source is self._prepared:
+            with self._lock:
+                incoming, self._prepared = self._prepared, None
+        else:
+            incoming = self.prepare(source, **stream_kwargs)
+            with self._lock:
+                self._prepared = None
+        start = self._start(incoming)
+        with self._lock:
+            outgoing, self._current = self._current, incoming
+            # A stream already fading keeps fading, from its current gain.
+            self._fades = [fade for fade in self._fades if fade.stream is not incoming and fade.stream is not outgoing]
+            self._fades.append(_Fade(incoming, 0.0, gain, start, duration))
+            if outgoing is not None:
+                self._fades.append(_Fade(outgoing, outgoing.gain, 0.0, start, duration))
+            self._ensure_thread()
+        return incoming
+
+    def fade_out(self, duration=2.0):
+        """Fades the current stream to silence and destroys it."""
+        with self._lock:
+            outgoing, self._current = self._current, None
+            if outgoing is None:
+                return
+            self._fades = [fade for fade in self._fades if fade.stream is not outgoing]
+            self._fades.append(_Fade(outgoing, outgoing.gain, 0.0, time.perf_counter(), duration))
+            self._ensure_thread()
+
+    def _start(self, stream):
+        """
+        Starts a stream on the device clock when the extensions allow it.
+
+        Returns:
+            float: The `time.perf_counter()` time at which playback starts.
+        """
+        device = self.device
+        if (self.start_delay > 0 and device is not None and device.is_extension_present('ALC_SOFT_device_clock')
+                and al.alIsExtensionPresent(b"AL_SOFT_source_start_delay")):
+            clock = device.get_clock()['clock']
+            stream.play_at_time(clock + seconds_to_nanoseconds(self.start_delay))
+            return time.perf_counter() + self.start_delay
+        stream.play()
+        return time.perf_counter()
+
+    def _ensure_thread(self):
+        # Called with the lock held.
+        self._wake.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="py_openal-Crossfader", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            finished = []
+            with self._lock:
+                if not self._fades:
+                    self._thread = None
+                    return
+                now = time.perf_counter()
+                remaining = []
+                for fade in self._fades:
+                    gain, done = fade.gain_at(now)
+                    if fade.stream._id_value is None:
+                        continue
+                    fade.stream.gain = gain
+                    if not done:
+                        remaining.append(fade)
+                    elif fade.end_gain == 0.0 and fade.stream is not self._current:
+                        finished.append(fade.stream)
+                self._fades = remaining
+            for stream in finished:
+                stream.destroy()
+            self._wake.wait(self.period)
+
+    def destroy(self):
+        """Stops all fades and destroys every stream the crossfader holds."""
+        with self._lock:
+            streams = [fade.stream for fade in self._fades]
+            streams += [s for s in (self._current, self._prepared) if s is not None and s not in streams]
+            self._fades = []
+            self._current = None
+            self._prepared = None
+            thread = self._thread
+            self._wake.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        for stream in streams:
+            stream.destroy()
@@ -1,8 +1,10 @@
 import ctypes
+import time
 from collections import namedtuple
 from . import al
 from .enums import DebugSource, DebugType, DebugSeverity
 from .exceptions import OalError
+from .telemetry import CallbackTelemetry
 
 # A user-friendly structure to hold debug message data
 DebugMessage = namedtuple('DebugMessage', ['source', 'type', 'id', 'severity', 'message'])
@@ -10,11 +12,19 @@ DebugMessage = namedtuple('DebugMessage', ['source', 'type', 'id', 'severity', '
 # Global variable to hold the user's Python callback function
 _user_debug_callback = None
 
+# Timing of the debug message handler.
+telemetry = CallbackTelemetry('debug')
+
 def _c_debug_callback_handler(source, msg_type, msg_id, severity, length, message, user_param):
     """
     This is the internal C-level callback function.
     It receives the message from OpenAL and dispatches it to the Python callback.
     """
+    start = time.perf_counter()
+    _dispatch_debug_message(source, msg_type, msg_id, severity, message)
+    telemetry.record_call(start, time.perf_counter())
+
+def _dispatch_debug_message(source, msg_type, msg_id, severity, message):
     if _user_debug_callback:
         try:
             msg_str = message.decode('utf-8') if message else ""
@@ -29,6 +39,7 @@ def _c_debug_callback_handler(source, msg_type, msg_id, severity, length, messag
             
             _user_debug_callback(debug_message)
         except Exception as e:
+            telemetry.record_exception(e)
             print(f"Unhandled exception in OpenAL debug callback: {e}")
 
 # Create a C-compatible function pointer from our Python handler.
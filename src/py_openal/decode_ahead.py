@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import deque, namedtuple
+from .exceptions import OalError
+
+# Counters of a DecodeAheadStream. `stalls` counts refills that found no
+# decoded chunk ready. Times are in seconds.
+DecodeStats = namedtuple('DecodeStats', ['chunks', 'bytes', 'stalls', 'decode_time',
+                                         'max_decode_time', 'queued_chunks'])
+
+class DecodeWorker:
+    """
+    A background thread that decodes ahead for any number of streams.
+
+    Each registered DecodeAheadStream is topped up to its queue depth in
+    turn. The thread sleeps while every queue is full.
+    """
+    def __init__(self):
+        self._readers = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def add(self, reader):
+        """Registers a reader and starts the thread if needed."""
+        with self._cond:
+            if reader not in self._readers:
+                self._readers.append(reader)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="py_openal-DecodeWorker", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def remove(self, reader):
+        """Unregisters a reader."""
+        with self._cond:
+            if reader in self._readers:
+                self._readers.remove(reader)
+
+    def notify(self):
+        """Wakes the thread after a reader consumed a chunk."""
+        with self._cond:
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                pending = [r for r in self._readers if r._wants_data()]
+                if not pending:
+                    self._cond.wait()
+                    continue
+            for reader in pending:
+                reader._decode_chunk()
+
+
+_default_worker = None
+_default_worker_lock = threading.Lock()
+
+def _get_default_worker():
+    global _default_worker
+    with _default_worker_lock:
+        if _default_worker is None:
+            _default_worker = DecodeWorker()
+        return _default_worker
+
+
+class DecodeAheadStream:
+    """
+    Wraps a stream decoder and decodes chunks ahead of time on a worker thread.
+
+    The decoded chunks wait in a bounded queue, so a SourceStream refill only
+    has to take a ready chunk and upload it. A slow decode (a Vorbis or MP3
+    frame, a disk read) no longer blocks whoever calls `update()`.
+
+    It has the same interface as the loaders' stream classes, plus
+    `try_get_buffer()`, which never blocks.
+    """
+    def __init__(self, audio_file, chunk_size, depth=4, worker=None, decode_time=None):
+        """
+        Args:
+            audio_file: A stream decoder with `channels`, `frequency`,
+                        `bit_depth` and `get_buffer(size)`.
+            chunk_size (int): Bytes to decode per chunk. Usually the stream's
+                              buffer size.
+            depth (int, optional): Maximum number of decoded chunks held
+                                   ahead. Defaults to 4.
+            worker (DecodeWorker, optional): The thread to decode on. Defaults
+                                             to a shared worker.
+            decode_time (Histogram, optional): A histogram to record the
+                                               time of every chunk decode in.
+        """
+        if depth < 1:
+            raise ValueError("depth must be at least 1.")
+        self.audio_file = audio_file
+        self.channels = audio_file.channels
+        self.frequency = audio_file.frequency
+        self.bit_depth = getattr(audio_file, 'bit_depth', 16)
+        self.chunk_size = chunk_size
+        self.depth = depth
+
+        self._chunks = deque()
+        self._cond = threading.Condition()
+        self._decode_lock = threading.Lock()
+        self._eof = False
+        self._error = None
+        self._closed = False
+
+        self._chunk_count = 0
+        self._byte_count = 0
+        self._stalls = 0
+        self._decode_time = 0.0
+        self._max_decode_time = 0.0
+        self._decode_histogram = decode_time
+
+        self._worker = worker if worker is not None else _get_default_worker()
+        self._worker.add(self)
+
+    def _wants_data(self):
+        return not self._eof and not self._closed and len(self._chunks) < self.depth
+
+    def _decode_chunk(self):
+        """Decodes one chunk. Runs on the worker thread."""
+        with self._decode_lock:
+            if not self._wants_data():
+                return
+            start = time.perf_counter()
+            try:
+                data = self.audio_file.get_buffer(self.chunk_size)
+            except Exception as e:
+                data = None
+                self._error = e
+            elapsed = time.perf_counter() - start
+            if self._decode_histogram is not None:
+                self._decode_histogram.record(elapsed)
+
+            with self._cond:
+                self._decode_time += elapsed
+                if elapsed > self._max_decode_time:
+                    self._max_decode_time = elapsed
+                if data:
+                    self._chunks.append(bytes(data))
+                    self._chunk_count += 1
+                    self._byte_count += len(data)
+                else:
+                    self._eof = True
+                self._cond.notify_all()
+        if self._eof:
+            self._worker.remove(self)
+
+    def _take(self):
+        """Pops a ready chunk. Must be called with the condition held."""
+        data = self._chunks.popleft()
+        self._worker.notify()
+        return data
+
+    def try_get_buffer(self, size=None):
+        """
+        Returns the next decoded chunk without blocking.
+
+        Returns:
+            bytes or None: The chunk, b'' at the end of the stream, or None if
+                           the decoder has not produced the next chunk yet.
+        """
+        with self._cond:
+            if self._chunks:
+                return self._take()
+            if self._error is not None:
+                raise self._error
+            if self._eof:
+                return b''
+            self._stalls += 1
+            return None
+
+    def get_buffer(self, size=None):
+        """
+        Returns the next decoded chunk, waiting for the worker if necessary.
+
+        Chunks are `chunk_size` bytes, so `size` is ignored.
+
+        Returns:
+            bytes: The chunk, or b'' at the end of the stream.
+        """
+        with self._cond:
+            if not self._chunks and not self._eof:
+                self._cond.wait_for(lambda: self._chunks or self._eof or self._closed)
+            if self._chunks:
+                return self._take()
+            if self._error is not None:
+                raise self._error
+            return b''
+
+    def get_stats(self) -> DecodeStats:
+        """Returns a snapshot of the decode counters."""
+        with self._cond:
+            return DecodeStats(self._chunk_count, self._byte_count, self._stalls, self._decode_time,
+                               self._max_decode_time, len(self._chunks))
+
+    def seek(self, frame):
+        """
+        Discards the chunks decoded ahead and repositions the wrapped decoder.
+
+        Returns:
+            int: The new position returned by the decoder's `seek()`.
+        """
+        seek = getattr(self.audio_file, 'seek', None)
+        if seek is None:
+            raise OalError("This audio stream does not support seeking.")
+        # Holding the decode lock waits for a chunk in progress, which would
+        # otherwise land in the queue after the flush.
+        with self._decode_lock:
+            with self._cond:
+                self._chunks.clear()
+                frame = seek(frame)
+                self._eof = False
+                self._error = None
+        if not self._closed:
+            self._worker.add(self)
+        return frame
+
+    def close(self):
+        """Stops decoding ahead and closes the wrapped decoder."""
+        self._worker.remove(self)
+        with self._decode_lock:
+            with self._cond:
+                self._closed = True
+                self._chunks.clear()
+                self._cond.notify_all()
+            close = getattr(self.audio_file, 'close', None)
+            if close is not None:
+                close()
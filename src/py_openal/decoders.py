@@ -0,0 +1,243 @@
+import os
+from collections import namedtuple
+from .enums import SampleType
+from ._optional import _optional_import
+
+# Number of bytes read from the start of a file for content sniffing.
+SNIFF_SIZE = 64
+
+# Stream properties read from a file's header without decoding it. `frames`
+# is None when the length cannot be determined cheaply.
+AudioInfo = namedtuple('AudioInfo', ['channels', 'frequency', 'bit_depth', 'frames'])
+
+class Decoder:
+    """
+    Describes an audio decoder that can be registered with the loaders.
+
+    A decoder provides a factory for full (resident) loading, for streaming,
+    or both. Factories are called as `factory(filepath, sample_type)` where
+    `sample_type` is the SampleType the loader would like to receive. It is
+    always one of the decoder's declared `sample_types`, so a decoder is never
+    asked to produce a format it cannot output natively. A decoder whose
+    output width depends on the file can give a `native_sample_type`
+    function, and the file's own sample type is then preferred whenever the
+    caller accepts it.
+
+    A full-load factory must return an object with `channels`, `frequency`,
+    `bit_depth`, `al_format` and `data` (bytes-like) attributes. A stream
+    factory must return an object with `channels`, `frequency`, `bit_depth`,
+    a `get_buffer(size)` method returning bytes (empty or None at the end of
+    the stream) and a `close()` method.
+
+    An optional `probe(filepath)` function returns an AudioInfo read from
+    the file's header, which lets `load()` choose between resident and
+    streamed playback without decoding the file.
+
+    Decoders declared with `file_objects=True` also accept a binary
+    file-like object in place of the path in their stream factory, which is
+    how `stream()` plays audio from memory or from archives.
+    """
+    def __init__(self, name, load=None, stream=None, extensions=(), magic=(),
+                 priority=0, sample_types=(SampleType.SHORT,), requires=None, probe=None,
+                 file_objects=False, native_sample_type=None, requires_flag=None):
+        """
+        Args:
+            name (str): A unique name for the decoder (e.g., 'miniaudio').
+            load (callable, optional): Factory used by `open()`.
+            stream (callable, optional): Factory used by `stream()`.
+            extensions (iterable[str], optional): File extensions handled by this
+                                                  decoder, including the dot.
+            magic (iterable, optional): Signatures used for content sniffing.
+                Each entry is either a bytes prefix, or an `(offset, bytes)`
+                tuple, or a tuple of several `(offset, bytes)` pairs that
+                must all match.
+            priority (int, optional): Higher priorities are tried first.
+                                      Defaults to 0.
+            sample_types (iterable[SampleType], optional): The sample types the
+                decoder can output without a conversion step, in order of
+                preference. Defaults to (SampleType.SHORT,).
+            requires (str, optional): The name of an optional module that must
+                be importable for this decoder to be used.
+            probe (callable, optional): Reads an AudioInfo from a file header.
+            file_objects (bool, optional): Whether the stream factory accepts
+                a readable, seekable binary file-like object instead of a
+                path. Defaults to False.
+            native_sample_type (callable, optional): Returns the SampleType a
+                file (path or file-like object) stores, or None if unknown.
+            requires_flag (str, optional): An attribute of the `requires`
+                module that must be true, for bindings that import even when
+                their native library is missing.
+        """
+        if load is None and stream is None:
+            raise ValueError("A decoder must provide a load or a stream factory.")
+        self.name = name
+        self.load = load
+        self.stream = stream
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.magic = tuple(_normalize_signature(sig) for sig in magic)
+        self.priority = priority
+        self.sample_types = tuple(sample_types)
+        self.requires = requires
+        self.probe = probe
+        self.file_objects = file_objects
+        self.native_sample_type = native_sample_type
+        self.requires_flag = requires_flag
+
+    @property
+    def is_available(self):
+        """
+        True if the decoder's optional dependency can be imported and, if a
+        `requires_flag` is given, reports its native library as loaded.
+        """
+        if self.requires is None:
+            return True
+        module = _optional_import(self.requires)
+        if module is None:
+            return False
+        return self.requires_flag is None or bool(getattr(module, self.requires_flag, False))
+
+    def matches_content(self, header):
+        """Returns True if any of the decoder's signatures match `header`."""
+        for signature in self.magic:
+            if all(header[offset:offset + len(data)] == data for offset, data in signature):
+                return True
+        return False
+
+    def choose_sample_type(self, supported, filepath=None):
+        """
+        Picks the first native sample type that the caller can accept.
+
+        Args:
+            supported (iterable[SampleType]): Sample types the caller can upload.
+            filepath (str or file-like, optional): The file to be decoded. If
+                the decoder reports the file's own sample type and the caller
+                accepts it, that type is chosen, so the file is not widened
+                or narrowed.
+
+        Returns:
+            SampleType or None: The chosen sample type, or None if there is no
+                                overlap.
+        """
+        if filepath is not None and self.native_sample_type is not None:
+            native = self.native_sample_type(filepath)
+            if native in self.sample_types and native in supported:
+                return native
+        for sample_type in self.sample_types:
+            if sample_type in supported:
+                return sample_type
+        return None
+
+    def __repr__(self):
+        return f"<Decoder {self.name!r} priority={self.priority}>"
+
+
+def _normalize_signature(signature):
+    """Converts the accepted magic forms to a tuple of (offset, bytes) pairs."""
+    if isinstance(signature, bytes):
+        return ((0, signature),)
+    if len(signature) == 2 and isinstance(signature[0], int):
+        return ((signature[0], signature[1]),)
+    return tuple((int(offset), bytes(data)) for offset, data in signature)
+
+
+# Registered decoders in registration order. Lookups sort by priority, and
+# later registrations win ties so applications can override the built-ins.
+_decoders = []
+
+def register_decoder(decoder):
+    """
+    Registers a decoder for use by `open()` and `stream()`.
+
+    If a decoder with the same name is already registered it is replaced.
+
+    Args:
+        decoder (Decoder): The decoder to register.
+    """
+    if not isinstance(decoder, Decoder):
+        raise TypeError("decoder must be a Decoder instance.")
+    unregister_decoder(decoder.name)
+    _decoders.append(decoder)
+
+def unregister_decoder(name):
+    """
+    Removes a registered decoder by name.
+
+    Returns:
+        bool: True if a decoder was removed.
+    """
+    for index, decoder in enumerate(_decoders):
+        if decoder.name == name:
+            del _decoders[index]
+            return True
+    return False
+
+def get_decoders():
+    """Returns the registered decoders, highest priority first."""
+    order = {id(d): i for i, d in enumerate(_decoders)}
+    return sorted(_decoders, key=lambda d: (d.priority, order[id(d)]), reverse=True)
+
+def _is_path(source):
+    """True if `source` is a path rather than a file-like object."""
+    return isinstance(source, (str, os.PathLike))
+
+def _read_header(filepath):
+    """Reads the first bytes of a file, or of a file-like object, for content sniffing."""
+    if not _is_path(filepath):
+        peek = getattr(filepath, 'peek', None)
+        if peek is not None:
+            return peek(SNIFF_SIZE)[:SNIFF_SIZE]
+        try:
+            position = filepath.tell()
+            header = filepath.read(SNIFF_SIZE)
+            filepath.seek(position)
+            return header
+        except (AttributeError, OSError):
+            return b''
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(SNIFF_SIZE)
+    except OSError:
+        return b''
+
+def find_decoders(filepath, extension=None, mode='load'):
+    """
+    Returns the decoders that can handle a file, best candidate first.
+
+    Decoders whose magic bytes match the file's content are preferred over
+    decoders that only match by extension, so misnamed files still open with
+    the right decoder. Decoders whose optional dependency is missing, or that
+    do not support the requested mode, are skipped.
+
+    Args:
+        filepath (str or file-like): Path to the audio file, or a binary
+            file-like object. Only decoders declared with `file_objects=True`
+            are returned for file-like objects, and only in 'stream' mode.
+        extension (str, optional): File extension hint. Defaults to detecting
+                                   from filepath, or from the `name` of a
+                                   file-like object.
+        mode (str, optional): 'load' or 'stream'. Defaults to 'load'.
+
+    Returns:
+        list[Decoder]: The candidate decoders.
+    """
+    if mode not in ('load', 'stream'):
+        raise ValueError("mode must be 'load' or 'stream'.")
+    is_path = _is_path(filepath)
+    if extension is None:
+        name = filepath if is_path else getattr(filepath, 'name', None)
+        extension = os.path.splitext(name)[1] if isinstance(name, (str, os.PathLike)) else ''
+    extension = extension.lower()
+    header = _read_header(filepath)
+
+    by_content = []
+    by_extension = []
+    for decoder in get_decoders():
+        if getattr(decoder, mode) is None or not decoder.is_available:
+            continue
+        if not is_path and (mode != 'stream' or not decoder.file_objects):
+            continue
+        if header and decoder.matches_content(header):
+            by_content.append(decoder)
+        elif extension in decoder.extensions:
+            by_extension.append(decoder)
+    return by_content + by_extension
@@ -385,6 +385,16 @@ class Device:
         hrtf_name = alc.alcGetStringiSOFT(self._device, alc.ALC_HRTF_SPECIFIER_SOFT, 0)
         return hrtf_name.decode('utf-8')
 
+    @property
+    def frequency(self) -> int:
+        """The output (mixing) frequency of the device in Hz."""
+        if self.is_closed:
+            raise OalError("Device is closed.")
+
+        value = ctypes.c_int(0)
+        alc.alcGetIntegerv(self._device, alc.ALC_FREQUENCY, 1, ctypes.byref(value))
+        return value.value
+
     @property
     def max_ambisonic_order(self) -> int:
         """
@@ -108,6 +108,16 @@ class AudioFormat(IntEnum):
     MONO_FLOAT32 = al.AL_FORMAT_MONO_FLOAT32
     STEREO_FLOAT32 = al.AL_FORMAT_STEREO_FLOAT32
 
+    # Compressed formats, decoded by the mixer
+    MONO_MULAW = al.AL_FORMAT_MONO_MULAW_EXT
+    STEREO_MULAW = al.AL_FORMAT_STEREO_MULAW_EXT
+    MONO_ALAW = al.AL_FORMAT_MONO_ALAW_EXT
+    STEREO_ALAW = al.AL_FORMAT_STEREO_ALAW_EXT
+    MONO_IMA4 = al.AL_FORMAT_MONO_IMA4
+    STEREO_IMA4 = al.AL_FORMAT_STEREO_IMA4
+    MONO_MSADPCM = al.AL_FORMAT_MONO_MSADPCM_SOFT
+    STEREO_MSADPCM = al.AL_FORMAT_STEREO_MSADPCM_SOFT
+
     # Multi-channel formats
     QUAD8 = al.AL_FORMAT_QUAD8
     QUAD16 = al.AL_FORMAT_QUAD16
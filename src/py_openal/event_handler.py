@@ -1,8 +1,10 @@
 import ctypes
+import time
 from collections import namedtuple
 from . import al
 from . import alc
 from .enums import EventType, DeviceEventType, DeviceType
+from .telemetry import CallbackTelemetry
 
 # A user-friendly structure to hold event data
 Event = namedtuple('Event', ['type', 'object_id', 'param', 'message'])
@@ -10,11 +12,20 @@ Event = namedtuple('Event', ['type', 'object_id', 'param', 'message'])
 # Global variable to hold the user's Python callback function
 _user_callback = None
 
+# Timing of the event and system event handlers.
+telemetry = CallbackTelemetry('event_handler')
+system_telemetry = CallbackTelemetry('system_event_handler')
+
 def _c_callback_handler(event_type, obj_id, param, length, message, user_param):
     """
     This is the internal C-level callback function.
     It receives the event from OpenAL and dispatches it to the Python callback.
     """
+    start = time.perf_counter()
+    _dispatch_event(event_type, obj_id, param, message)
+    telemetry.record_call(start, time.perf_counter())
+
+def _dispatch_event(event_type, obj_id, param, message):
     if _user_callback:
         try:
             msg_str = message.decode('utf-8') if message else ""            
@@ -29,6 +40,7 @@ def _c_callback_handler(event_type, obj_id, param, length, message, user_param):
             # Call the user's registered Python function
             _user_callback(event)
         except Exception as e:
+            telemetry.record_exception(e)
             print(f"Unhandled exception in OpenAL event callback: {e}")
 
 # Create a C-compatible function pointer from our Python handler
@@ -101,6 +113,11 @@ def _c_system_callback_handler(event_type, device_type, device, length, message,
     Internal C-level callback for system events.
     Receives events from OpenAL and dispatches them to the Python callback.
     """
+    start = time.perf_counter()
+    _dispatch_system_event(event_type, device_type, message)
+    system_telemetry.record_call(start, time.perf_counter())
+
+def _dispatch_system_event(event_type, device_type, message):
     if _user_system_callback:
         try:
             # For system events, the 'message' contains the device name.
@@ -113,6 +130,7 @@ def _c_system_callback_handler(event_type, device_type, device, length, message,
             )
             _user_system_callback(event)
         except Exception as e:
+            system_telemetry.record_exception(e)
             print(f"Unhandled exception in OpenAL system event callback: {e}")
 
 _C_SYSTEM_EVENT_CALLBACK = alc.ALCEVENTPROCSOFT(_c_system_callback_handler)
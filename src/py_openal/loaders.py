@@ -1,168 +1,1060 @@
 import os
+import io
 import wave
+import array
+import ctypes
+from . import al
+from . import alc
 from .buffer import Buffer
 from .source import Source
 from .stream import SourceStream, _channels_to_al_format
+from .playlist import PlaylistStream
+from .stems import StemGroup
 from .exceptions import OalError
 from ._internal import _ensure_context
+from .enums import SampleType
+from .decoders import Decoder, AudioInfo, register_decoder, find_decoders, _is_path
+from ._optional import _optional_import, _is_available
+from .resample import resample_pcm
+from .compression import compress_pcm, check_compression_support
+from .cache import get_buffer_cache
+from .stream_manager import get_stream_manager
 
-try:
-    import miniaudio
-    MINIAUDIO_OK = True
-except ImportError:
-    MINIAUDIO_OK = False
+# Codec backends are imported lazily, the first time a file that needs them is
+# opened. Importing py_openal therefore never pulls in miniaudio or PyOgg for
+# applications that only play WAV files.
+_LAZY_AVAILABILITY_FLAGS = {
+    'MINIAUDIO_OK': 'miniaudio',
+    'PYOGG_OK': 'pyogg',
+}
 
-try:
-    from pyogg import VorbisFile, VorbisFileStream, OpusFile, OpusFileStream
-    PYOGG_OK = True
-except ImportError:
-    PYOGG_OK = False
-    class VorbisFile: pass
-    class VorbisFileStream: pass
-    class OpusFile: pass
-    class OpusFileStream: pass
+def __getattr__(name):
+    # Keeps the old MINIAUDIO_OK/PYOGG_OK module attributes working without
+    # probing the backends at import time.
+    if name in _LAZY_AVAILABILITY_FLAGS:
+        return _is_available(_LAZY_AVAILABILITY_FLAGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
+def _check_wave_sample_width(wf):
+    """Returns the bit depth of a wave file, rejecting widths OpenAL cannot take."""
+    bit_depth = wf.getsampwidth() * 8
+    if bit_depth not in (8, 16):
+        raise OalError(f"Unsupported WAV sample width: {bit_depth}-bit integer PCM.")
+    return bit_depth
+
+# Flips the sign bit, converting between signed and unsigned 8-bit samples.
+_FLIP_SIGN = bytes((i ^ 0x80) for i in range(256))
+
+def _wave_output_bits(sample_type, bit_depth):
+    """The bit depth a wave decoder produces for a requested SampleType."""
+    if sample_type is None:
+        return bit_depth
+    if sample_type == SampleType.SHORT:
+        return 16
+    if sample_type == SampleType.UNSIGNED_BYTE:
+        return 8
+    raise OalError(f"The WAV decoder cannot output {sample_type!r} samples.")
+
+def _convert_wave_samples(data, from_bits, to_bits):
+    """Converts little-endian PCM between 8-bit unsigned and 16-bit signed."""
+    if from_bits == to_bits:
+        return data
+    if to_bits == 8:
+        # Keep the high byte of each sample.
+        return bytes(data[1::2]).translate(_FLIP_SIGN)
+    out = bytearray(len(data) * 2)
+    out[1::2] = bytes(data).translate(_FLIP_SIGN)
+    return bytes(out)
+
+def _open_wave(filepath):
+    """Opens a WAV file for reading. The wave module does not take PathLike objects."""
+    return wave.open(os.fspath(filepath) if _is_path(filepath) else filepath, 'rb')
+
+def _wave_native_sample_type(filepath):
+    """The SampleType a WAV file stores, or None if the header cannot be read."""
+    position = None if _is_path(filepath) else filepath.tell()
+    try:
+        with _open_wave(filepath) as wf:
+            width = wf.getsampwidth()
+    except (wave.Error, EOFError, OSError):
+        return None
+    finally:
+        if position is not None:
+            filepath.seek(position)
+    return {1: SampleType.UNSIGNED_BYTE, 2: SampleType.SHORT}.get(width)
+
+def _probe_wave(filepath):
+    """Reads the stream properties from a WAV header."""
+    with _open_wave(filepath) as wf:
+        return AudioInfo(wf.getnchannels(), wf.getframerate(), wf.getsampwidth() * 8, wf.getnframes())
+
 class WaveFile:
-    """Loads a full wave file into memory."""
-    def __init__(self, filepath):
-        with wave.open(filepath, 'rb') as wf:
+    """
+    Loads a full wave file into memory, converting 8-bit and 16-bit samples
+    to the requested sample type.
+    """
+    def __init__(self, filepath, sample_type=None):
+        with _open_wave(filepath) as wf:
             self.channels = wf.getnchannels()
-            self.bit_depth = wf.getsampwidth() * 8
+            file_bits = _check_wave_sample_width(wf)
+            self.bit_depth = _wave_output_bits(sample_type, file_bits)
             self.frequency = wf.getframerate()
-            self.data = wf.readframes(wf.getnframes())
+            self.data = _convert_wave_samples(wf.readframes(wf.getnframes()), file_bits, self.bit_depth)
             self.al_format = _channels_to_al_format(self.channels, self.bit_depth)
 
 class WaveFileStream:
-    """Provides a streaming interface for a wave file."""
-    def __init__(self, filepath):
-        self.wf = wave.open(filepath, 'rb')
+    """
+    Provides a streaming interface for a wave file, converting 8-bit and
+    16-bit samples to the requested sample type.
+    """
+    def __init__(self, filepath, sample_type=None):
+        self.filepath = filepath
+        self.wf = _open_wave(filepath)
         self.channels = self.wf.getnchannels()
-        self.bit_depth = self.wf.getsampwidth() * 8
+        try:
+            self._file_bits = _check_wave_sample_width(self.wf)
+            self.bit_depth = _wave_output_bits(sample_type, self._file_bits)
+        except OalError:
+            self.wf.close()
+            raise
         self.frequency = self.wf.getframerate()
+        self.num_frames = self.wf.getnframes()
         self.is_closed = False
 
     def get_buffer(self, size):
         """Reads a chunk of data from the file."""
         if self.is_closed:
             return None
+        # At the end of the data this returns b'' and the file stays open,
+        # so the stream can be seeked back without reopening it.
         data = self.wf.readframes(size // (self.channels * self.bit_depth // 8))
-        if not data:
-            self.close()
-        return data
+        return _convert_wave_samples(data, self._file_bits, self.bit_depth)
+
+    def seek(self, frame):
+        """
+        Moves the read position to a sample frame.
+
+        Returns:
+            int: The new position, clamped to the length of the file.
+        """
+        if self.is_closed:
+            raise OalError("Cannot seek a closed stream.")
+        frame = min(max(0, frame), self.wf.getnframes())
+        self.wf.setpos(frame)
+        return frame
 
     def close(self):
         if not self.is_closed:
             self.wf.close()
             self.is_closed = True
 
+def _miniaudio_output_format(miniaudio, sample_type):
+    """Maps a SampleType to a miniaudio SampleFormat and its bit depth."""
+    if sample_type == SampleType.FLOAT:
+        return miniaudio.SampleFormat.FLOAT32, 32
+    if sample_type == SampleType.UNSIGNED_BYTE:
+        return miniaudio.SampleFormat.UNSIGNED8, 8
+    return miniaudio.SampleFormat.SIGNED16, 16
+
+def _read_all(fileobj):
+    """
+    Returns the rest of a file-like object's data as bytes. miniaudio's
+    in-memory functions take `bytes` only, not a memoryview.
+    """
+    return bytes(fileobj.read())
+
+def _miniaudio_memory_info(miniaudio, data):
+    """Reads the stream properties of an encoded file held in memory."""
+    for get_info in (miniaudio.wav_get_info, miniaudio.flac_get_info, miniaudio.vorbis_get_info,
+                     miniaudio.mp3_get_info):
+        try:
+            return get_info(data)
+        except miniaudio.DecodeError:
+            continue
+    raise OalError("miniaudio cannot decode this audio data.")
+
+def _probe_miniaudio(filepath):
+    """Reads the stream properties of any file miniaudio can decode."""
+    miniaudio = _optional_import('miniaudio')
+    info = miniaudio.get_file_info(filepath)
+    return AudioInfo(info.nchannels, info.sample_rate, info.sample_width * 8, info.num_frames or None)
+
 class MiniAudioFile:
     """Loads a full audio file into memory using miniaudio."""
-    def __init__(self, filepath):
-        decoded = miniaudio.decode_file(filepath)
+    def __init__(self, filepath, sample_type=None):
+        miniaudio = _optional_import('miniaudio')
+        output_format, self.bit_depth = _miniaudio_output_format(miniaudio, sample_type)
+        # Decode at the file's own channel count and rate; miniaudio would
+        # otherwise downmix to stereo and resample to 44.1 kHz.
+        info = miniaudio.get_file_info(filepath)
+        decoded = miniaudio.decode_file(filepath, output_format=output_format,
+                                        nchannels=info.nchannels, sample_rate=info.sample_rate)
         self.channels = decoded.nchannels
-        self.bit_depth = 16  # miniaudio decodes to 16-bit PCM
         self.frequency = decoded.sample_rate
         self.data = decoded.samples.tobytes()
         self.al_format = _channels_to_al_format(self.channels, self.bit_depth)
 
 class MiniAudioStream:
-    """Provides a streaming interface for an audio file using miniaudio."""
-    def __init__(self, filepath):
-                # miniaudio's stream_file returns a generator
-        self._stream_generator = miniaudio.stream_file(filepath)
-        
-        # We need to pull the first chunk to get the stream info
-        first_chunk = next(self._stream_generator)
-        self.channels = first_chunk.nchannels
-        self.bit_depth = 16 # miniaudio decodes to 16-bit PCM
-        self.frequency = first_chunk.sample_rate
-        self.is_closed = False        
-        self._first_chunk_data = first_chunk.samples.tobytes()
+    """
+    Provides a streaming interface for an audio file using miniaudio.
+
+    A file-like object is read into memory once, since miniaudio needs the
+    whole file to report its format; decoding is still incremental. One
+    miniaudio decoder stays open until `close()`, and `seek()` repositions
+    it, so seeking and looping never reopen the file.
+    """
+
+    # Frames decoded per call at most; larger reads are split across calls.
+    MAX_FRAMES_PER_READ = 16384
+
+    def __init__(self, filepath, sample_type=None):
+        miniaudio = _optional_import('miniaudio')
+        output_format, self.bit_depth = _miniaudio_output_format(miniaudio, sample_type)
+        if _is_path(filepath):
+            self._data = None
+            info = miniaudio.get_file_info(filepath)
+        else:
+            self._data = _read_all(filepath)
+            info = _miniaudio_memory_info(miniaudio, self._data)
+        self.filepath = filepath
+        self.channels = info.nchannels
+        self.frequency = info.sample_rate
+        self.num_frames = info.num_frames or None
+        self._ffi, self._lib = miniaudio.ffi, miniaudio.lib
+        self._frame_size = self.channels * self.bit_depth // 8
+        self._decode_buffer = self._ffi.new("int8_t[]", self.MAX_FRAMES_PER_READ * self._frame_size)
+        self._frames_read = self._ffi.new("ma_uint64 *")
+        self._decoder = self._ffi.new("ma_decoder *")
+        config = self._lib.ma_decoder_config_init(output_format.value, self.channels, self.frequency)
+        if self._data is not None:
+            # Keeps the buffer alive as long as the decoder reads from it.
+            self._source = self._ffi.from_buffer(self._data)
+            result = self._lib.ma_decoder_init_memory(self._source, len(self._data), self._ffi.addressof(config),
+                                                      self._decoder)
+        elif os.name == 'nt':
+            result = self._lib.ma_decoder_init_file_w(os.fsdecode(filepath), self._ffi.addressof(config),
+                                                      self._decoder)
+        else:
+            result = self._lib.ma_decoder_init_file(os.fsencode(filepath), self._ffi.addressof(config),
+                                                    self._decoder)
+        if result != self._lib.MA_SUCCESS:
+            raise OalError(f"miniaudio failed to open a decoder (error {result}).")
+        self.is_closed = False
 
     def get_buffer(self, size):
         """Reads a chunk of data from the file stream."""
         if self.is_closed:
             return None
 
-        # If we have the first chunk stored, return it
-        if self._first_chunk_data:
-            data = self._first_chunk_data
-            self._first_chunk_data = None
-            return data
+        frames = max(1, min(size // self._frame_size, self.MAX_FRAMES_PER_READ))
+        result = self._lib.ma_decoder_read_pcm_frames(self._decoder, self._decode_buffer, frames,
+                                                      self._frames_read)
+        count = self._frames_read[0]
+        if result not in (self._lib.MA_SUCCESS, self._lib.MA_AT_END):
+            raise OalError(f"miniaudio failed to decode (error {result}).")
+        if not count:
+            # The end of the data. The decoder stays open, so the stream can
+            # be seeked back.
+            return None
+        return self._ffi.buffer(self._decode_buffer, count * self._frame_size)[:]
 
-        try:
-            chunk = next(self._stream_generator)
-            return chunk.samples.tobytes()
-        except StopIteration:
+    def seek(self, frame):
+        """
+        Moves the read position to a sample frame.
+
+        Returns:
+            int: The new position, clamped to the length of the file if known.
+        """
+        if self.is_closed:
+            raise OalError("Cannot seek a closed stream.")
+        frame = max(0, frame)
+        if self.num_frames is not None:
+            frame = min(frame, self.num_frames)
+        result = self._lib.ma_decoder_seek_to_pcm_frame(self._decoder, frame)
+        if result != self._lib.MA_SUCCESS:
+            raise OalError(f"miniaudio failed to seek to frame {frame} (error {result}).")
+        return frame
+
+    def close(self):
+        if not self.is_closed:
+            self._lib.ma_decoder_uninit(self._decoder)
+            self.is_closed = True
+
+    def __del__(self):
+        # Unlike OpenAL objects, the decoder does not depend on a context,
+        # so it is safe to free here.
+        if getattr(self, 'is_closed', True) is False:
+            self.close()
+
+
+class PCMIterableStream:
+    """
+    Provides a streaming interface for raw PCM produced by an iterable, such
+    as a procedural generator.
+
+    Chunks may be of any size and any bytes-like type (bytes, bytearray,
+    memoryview, array.array or a C-contiguous NumPy array); they are
+    gathered into chunks of the size requested by SourceStream.
+    """
+    def __init__(self, chunks, channels, frequency, bit_depth=16):
+        """
+        Args:
+            chunks (iterable): Yields interleaved PCM data.
+            channels (int): The number of interleaved channels.
+            frequency (int): The sample rate in Hz.
+            bit_depth (int, optional): 8 (unsigned), 16 (signed) or 32
+                                       (float). Defaults to 16.
+        """
+        _channels_to_al_format(channels, bit_depth)
+        self._chunks = iter(chunks)
+        self.channels = channels
+        self.frequency = frequency
+        self.bit_depth = bit_depth
+        self.is_closed = False
+        self._pending = bytearray()
+
+    def get_buffer(self, size):
+        """Reads a chunk of data from the iterable."""
+        if self.is_closed:
+            return None
+
+        frame_size = self.channels * self.bit_depth // 8
+        size = max(frame_size, size - size % frame_size)
+        while len(self._pending) < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                break
+            self._pending += memoryview(chunk).cast('B')
+
+        if len(self._pending) < size:
+            # The last chunk: drop a trailing partial frame.
+            size = len(self._pending) - len(self._pending) % frame_size
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        if not data:
             self.close()
+        return data
+
+    def close(self):
+        if not self.is_closed:
+            close = getattr(self._chunks, 'close', None)
+            if close is not None:
+                close()
+            self.is_closed = True
+
+class _ReadAheadFile:
+    """
+    Reads a file-like object in large blocks.
+
+    Decoders read headers and chunks in many small pieces. For a member of a
+    compressed archive each read may reach a decompressor, so the reads are
+    served from a read-ahead buffer instead.
+    """
+    def __init__(self, fileobj, block_size):
+        self._file = fileobj
+        self.block_size = block_size
+        self.name = getattr(fileobj, 'name', None)
+        self._buffer = b''
+        self._offset = 0
+
+    def _fill(self):
+        data = self._file.read(self.block_size)
+        if not data:
+            return False
+        self._buffer = self._buffer[self._offset:] + data
+        self._offset = 0
+        return True
+
+    def peek(self, size):
+        while len(self._buffer) - self._offset < size and self._fill():
+            pass
+        return self._buffer[self._offset:self._offset + size]
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._buffer[self._offset:] + self._file.read()
+            self._buffer = b''
+            self._offset = 0
+            return data
+        data = self.peek(size)
+        self._offset += len(data)
+        return data
+
+    def tell(self):
+        return self._file.tell() - (len(self._buffer) - self._offset)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset, whence = self.tell() + offset, io.SEEK_SET
+        if whence == io.SEEK_SET:
+            start = self._file.tell() - len(self._buffer)
+            if start <= offset <= start + len(self._buffer):
+                # Within the buffer: no need to touch the underlying file.
+                self._offset = offset - start
+                return offset
+        self._buffer = b''
+        self._offset = 0
+        return self._file.seek(offset, whence)
+
+    def seekable(self):
+        seekable = getattr(self._file, 'seekable', None)
+        return seekable() if seekable is not None else hasattr(self._file, 'seek')
+
+
+# Vorbis and Opus store surround audio in Vorbis channel order (front left,
+# center, front right, ...), while the OpenAL multichannel formats expect WAV
+# order (front left, front right, center, LFE, ...). For each channel count,
+# the Vorbis channel that goes to each WAV position. Mono, stereo and quad
+# are the same in both.
+_VORBIS_TO_WAV_ORDER = {
+    6: (0, 2, 1, 5, 3, 4),
+    7: (0, 2, 1, 6, 5, 3, 4),
+    8: (0, 2, 1, 7, 5, 6, 3, 4),
+}
+
+def _vorbis_to_wav_order(data, channels):
+    """Reorders interleaved 16-bit PCM from Vorbis to WAV channel order."""
+    order = _VORBIS_TO_WAV_ORDER.get(channels)
+    if order is None or not data:
+        return data
+    samples = array.array('h', data)
+    out = array.array('h', samples)
+    for position, channel in enumerate(order):
+        out[position::channels] = samples[channel::channels]
+    return out.tobytes()
+
+class PyOggFile:
+    """Loads a full Ogg Vorbis or Opus file into memory using PyOgg."""
+    def __init__(self, filepath, sample_type=None, opus=False):
+        pyogg = _optional_import('pyogg')
+        ogg_file = pyogg.OpusFile(filepath) if opus else pyogg.VorbisFile(filepath)
+        self.channels = ogg_file.channels
+        self.bit_depth = 16  # PyOgg decodes to 16-bit PCM
+        self.frequency = ogg_file.frequency
+        if isinstance(ogg_file.buffer, bytes):
+            self.data = ogg_file.buffer
+        else:
+            # OpusFile exposes a ctypes pointer rather than a bytes object.
+            self.data = ctypes.string_at(ogg_file.buffer, ogg_file.buffer_length)
+        self.data = _vorbis_to_wav_order(self.data, self.channels)
+        self.al_format = _channels_to_al_format(self.channels, self.bit_depth)
+
+class PyOggStream:
+    """
+    Provides a streaming interface for an Ogg Vorbis or Opus file using PyOgg.
+
+    PyOgg's stream objects return `(pointer, length)` chunks of a fixed size,
+    so this adapter converts them to bytes and gathers them into chunks of the
+    size requested by SourceStream.
+    """
+    def __init__(self, filepath, sample_type=None, opus=False):
+        self.filepath = filepath
+        self._opus = opus
+        self._stream = self._open_stream()
+        self.channels = self._stream.channels
+        self.bit_depth = 16  # PyOgg decodes to 16-bit PCM
+        self.frequency = self._stream.frequency
+        self.num_frames = self._pcm_total()
+        self.is_closed = False
+        # PyOgg frees its decoder (clean_up / ov_clear) when get_buffer()
+        # returns None, so the handle must not be used or freed again after that.
+        self._exhausted = False
+        self._pending = b''
+
+    def _pcm_total(self):
+        """The length of the stream in frames, or None if PyOgg cannot tell."""
+        if self._opus:
+            return self._stream.pcm_size
+        pcm_total = getattr(_optional_import('pyogg').vorbis, 'ov_pcm_total', None)
+        if pcm_total is None:
+            return None
+        return pcm_total(ctypes.byref(self._stream.vf), -1)
+
+    def _open_stream(self):
+        pyogg = _optional_import('pyogg')
+        return pyogg.OpusFileStream(self.filepath) if self._opus else pyogg.VorbisFileStream(self.filepath)
+
+    def get_buffer(self, size):
+        """Reads a chunk of data from the file stream."""
+        if self.is_closed:
             return None
 
+        # Whole frames only, so the channels can be reordered.
+        frame_size = self.channels * 2
+        size = max(frame_size, size - size % frame_size)
+        chunks = [self._pending] if self._pending else []
+        collected = len(self._pending)
+        while collected < size:
+            if self._exhausted:
+                break
+            result = self._stream.get_buffer()
+            if result is None:
+                self._exhausted = True
+                break
+            buf, length = result
+            if not length:
+                break
+            chunk = ctypes.string_at(buf, length)
+            chunks.append(chunk)
+            collected += length
+
+        data = b''.join(chunks)
+        self._pending = data[size:]
+        data = data[:size]
+        if not data:
+            self.close()
+        return _vorbis_to_wav_order(data, self.channels)
+
+    def seek(self, frame):
+        """
+        Moves the read position to a sample frame with `ov_pcm_seek` or
+        `op_pcm_seek`.
+
+        Returns:
+            int: The new position, clamped to the length of the file.
+        """
+        pyogg = _optional_import('pyogg')
+        if self._opus:
+            pcm_seek = getattr(pyogg.opus, 'op_pcm_seek', None)
+        else:
+            pcm_seek = getattr(pyogg.vorbis, 'ov_pcm_seek', None)
+        if pcm_seek is None:
+            raise OalError("This PyOgg build does not expose PCM seeking.")
+        if self._exhausted:
+            # PyOgg frees the decoder at the end of the data, and close()
+            # frees it too; seeking back reopens it.
+            self._stream = self._open_stream()
+            self._exhausted = False
+            self.is_closed = False
+        frame = max(0, frame)
+        if self.num_frames is not None:
+            frame = min(frame, self.num_frames)
+        if self._opus:
+            error = pcm_seek(self._stream.of, frame)
+        else:
+            error = pcm_seek(ctypes.byref(self._stream.vf), frame)
+        if error != 0:
+            raise OalError(f"Failed to seek to sample frame {frame} (error code {error}).")
+        self._pending = b''
+        return frame
+
+    def _clean_up(self):
+        """Frees the PyOgg decoder unless PyOgg already has."""
+        if not self._exhausted:
+            self._exhausted = True
+            clean_up = getattr(self._stream, 'clean_up', None)
+            if clean_up is not None:
+                clean_up()
+
     def close(self):
         if not self.is_closed:
+            self._clean_up()
             self.is_closed = True
 
 
-def open(filepath, extension=None):
+def _opus_factory(factory):
+    """Binds `opus=True` for the PyOgg Opus decoders."""
+    def create(filepath, sample_type=None):
+        return factory(filepath, sample_type, opus=True)
+    return create
+
+# Signatures used for content sniffing.
+_WAVE_MAGIC = (((0, b'RIFF'), (8, b'WAVE')),)
+_VORBIS_MAGIC = (((0, b'OggS'), (29, b'vorbis')),)
+_OPUS_MAGIC = (((0, b'OggS'), (28, b'OpusHead')),)
+_MP3_MAGIC = (b'ID3', b'\xff\xfb', b'\xff\xf3', b'\xff\xf2')
+_FLAC_MAGIC = (b'fLaC',)
+
+# miniaudio decodes in floating point internally and can output any of these.
+_MINIAUDIO_SAMPLE_TYPES = (SampleType.FLOAT, SampleType.SHORT, SampleType.UNSIGNED_BYTE)
+
+register_decoder(Decoder(
+    'wave', load=WaveFile, stream=WaveFileStream,
+    extensions=('.wav', '.wave'), magic=_WAVE_MAGIC,
+    sample_types=(SampleType.SHORT, SampleType.UNSIGNED_BYTE), probe=_probe_wave,
+    file_objects=True, native_sample_type=_wave_native_sample_type,
+))
+register_decoder(Decoder(
+    'pyogg-vorbis', load=PyOggFile, stream=PyOggStream,
+    extensions=('.ogg', '.oga'), magic=_VORBIS_MAGIC,
+    requires='pyogg', requires_flag='PYOGG_VORBIS_FILE_AVAIL',
+))
+register_decoder(Decoder(
+    'pyogg-opus', load=_opus_factory(PyOggFile), stream=_opus_factory(PyOggStream),
+    extensions=('.opus',), magic=_OPUS_MAGIC,
+    requires='pyogg', requires_flag='PYOGG_OPUS_FILE_AVAIL',
+))
+register_decoder(Decoder(
+    'miniaudio', load=MiniAudioFile, stream=MiniAudioStream,
+    extensions=('.mp3', '.flac'), magic=_MP3_MAGIC + _FLAC_MAGIC,
+    sample_types=_MINIAUDIO_SAMPLE_TYPES, requires='miniaudio', probe=_probe_miniaudio,
+    file_objects=True,
+))
+# miniaudio can also decode WAV and Vorbis. It is registered at a lower
+# priority so it only handles them when the preferred decoder is unavailable.
+register_decoder(Decoder(
+    'miniaudio-fallback', load=MiniAudioFile, stream=MiniAudioStream,
+    extensions=('.wav', '.wave', '.ogg', '.oga'), magic=_WAVE_MAGIC + _VORBIS_MAGIC,
+    priority=-10, sample_types=_MINIAUDIO_SAMPLE_TYPES, requires='miniaudio',
+    probe=_probe_miniaudio, file_objects=True,
+))
+
+
+def _supported_sample_types():
+    """
+    Returns the sample types the loaders can upload to OpenAL.
+
+    Float32 is only offered when the current context has AL_EXT_float32, so
+    decoders that work in floating point internally can hand over their
+    output without requantizing it to 16-bit.
+    """
+    if al.alIsExtensionPresent(b"AL_EXT_float32"):
+        return (SampleType.FLOAT, SampleType.SHORT, SampleType.UNSIGNED_BYTE)
+    return (SampleType.SHORT, SampleType.UNSIGNED_BYTE)
+
+def _get_mixing_frequency():
+    """Returns the output frequency (ALC_FREQUENCY) of the current context's device."""
+    device = alc.alcGetContextsDevice(alc.alcGetCurrentContext())
+    if not device:
+        return 0
+    value = ctypes.c_int()
+    alc.alcGetIntegerv(device, alc.ALC_FREQUENCY, 1, ctypes.byref(value))
+    return value.value
+
+def _create_decoded(filepath, extension, mode, supported=None):
+    """
+    Finds a decoder for `filepath` and runs its factory for `mode`.
+
+    Args:
+        supported (tuple[SampleType], optional): Sample types the caller
+            accepts. Defaults to what the current context can upload.
+
+    Returns:
+        tuple: The (decoder, decoded object) pair.
+    """
+    if supported is None:
+        supported = _supported_sample_types()
+    candidates = find_decoders(filepath, extension, mode)
+    position = None if _is_path(filepath) else filepath.tell()
+    error = None
+    for decoder in candidates:
+        sample_type = decoder.choose_sample_type(supported, filepath)
+        if sample_type is None:
+            continue
+        try:
+            return decoder, getattr(decoder, mode)(filepath, sample_type)
+        except Exception as e:
+            # A backend may still fail on this file, e.g. a binding whose
+            # native library cannot open it; try the next candidate.
+            error = e
+            if position is not None:
+                filepath.seek(position)
+
+    if error is not None:
+        raise OalError(f"No decoder could open {filepath!r}: {error}") from error
+
+    if not _is_path(filepath):
+        raise OalError("Unsupported audio data: no registered decoder can stream it from memory "
+                       "or a file-like object.")
+    if extension is None:
+        extension = os.path.splitext(filepath)[1].lower()
+    if mode == 'stream':
+        raise OalError(f"Unsupported file format for streaming: {extension}. Or required library (PyOgg/miniaudio) is not installed.")
+    raise OalError(f"Unsupported file format: {extension}. Or required library (PyOgg/miniaudio) is not installed.")
+
+
+def _load_buffer(filepath, extension=None, resample=False, compress=None, block_alignment=None, tag=None):
+    """
+    Decodes a file and uploads it into a new Buffer.
+
+    Takes the same options as `open()`.
+
+    Returns:
+        Buffer: The filled buffer.
+    """
+    if compress is not None:
+        check_compression_support(compress, block_alignment)
+        # The encoders work on 16-bit samples, so don't decode to float.
+        decoder, audio_file = _create_decoded(filepath, extension, 'load',
+                                              (SampleType.SHORT, SampleType.UNSIGNED_BYTE))
+    else:
+        decoder, audio_file = _create_decoded(filepath, extension, 'load')
+    data_format = audio_file.al_format
+    data = audio_file.data
+    frequency = audio_file.frequency
+
+    if resample:
+        target_frequency = _get_mixing_frequency()
+        if target_frequency and target_frequency != frequency:
+            data = resample_pcm(data, data_format, frequency, target_frequency)
+            frequency = target_frequency
+
+    if compress is not None:
+        compressed = compress_pcm(data, data_format, compress, block_alignment)
+        return Buffer(compressed.format, compressed.data, len(compressed.data), frequency,
+                      tag=tag, block_alignment=compressed.block_alignment)
+    return Buffer(data_format, data, len(data), frequency, tag=tag)
+
+def open(filepath, extension=None, resample=False, compress=None, block_alignment=None, cache=None):
     """
     Opens an audio file, loads it into a buffer, and returns a Source.
 
+    The decoder is chosen from the decoder registry (see
+    `py_openal.decoders.register_decoder`), matching on the file's content
+    first and on its extension second.
+
     Args:
         filepath (str): Path to the audio file.
         extension (str, optional): File extension hint (e.g., '.wav', '.ogg').
                                    Defaults to detecting from filepath.
+        resample (bool, optional): If True, the decoded audio is resampled
+            once to the device's mixing frequency (ALC_FREQUENCY) before it
+            is uploaded, so the mixer does not have to resample it on every
+            playback. Requires NumPy. Defaults to False.
+        compress (str, optional): Store the sound in a compressed format that
+            the mixer decodes during playback: 'mulaw' or 'alaw' (half the
+            size of 16-bit PCM), or 'ima4' or 'msadpcm' (about a quarter).
+            Mono and stereo only. Requires NumPy and the matching extension.
+            See `py_openal.compression.get_compression_stats()` for the
+            memory saved. Defaults to None (PCM).
+        block_alignment (int, optional): Sample frames per block for 'ima4'
+            or 'msadpcm'. Defaults to the format's standard alignment.
+        cache (bool or BufferCache, optional): If True, the buffer is shared
+            through the current context's BufferCache, so files with
+            identical content (under any path) use a single Buffer. A
+            BufferCache instance may be passed instead. The shared buffer is
+            released when the returned Source is destroyed. Defaults to None
+            (a private buffer).
 
     Returns:
         A pyopenal.Source object ready for playback.
     """
     _ensure_context()
-    if extension is None:
-        extension = os.path.splitext(filepath)[1].lower()
+    if not cache:
+        return Source(_load_buffer(filepath, extension, resample, compress, block_alignment))
 
-    if extension == '.wav':
-        audio_file = WaveFile(filepath)
-        buf = Buffer(audio_file.al_format, audio_file.data, len(audio_file.data), audio_file.frequency)
-        return Source(buf)
-    elif PYOGG_OK and extension in ('.ogg', '.opus'):
-        ogg_file = VorbisFile(filepath) if extension == '.ogg' else OpusFile(filepath)
-        al_format = _channels_to_al_format(ogg_file.channels, 16)
-        buf = Buffer(al_format, ogg_file.buffer, len(ogg_file.buffer), ogg_file.frequency)
-        return Source(buf)
-    elif MINIAUDIO_OK and extension in ('.mp3', '.flac'):
-        audio_file = MiniAudioFile(filepath)
-        buf = Buffer(audio_file.al_format, audio_file.data, len(audio_file.data), audio_file.frequency)
-        return Source(buf)
+    if cache is True:
+        cache = get_buffer_cache()
+    buf = cache.acquire(filepath, extension, resample=resample, compress=compress,
+                        block_alignment=block_alignment)
+    source = Source(buf)
+    source._destroy_callbacks.append(lambda _source: cache.release(buf))
+    return source
+
+def _open_stream_source(source, extension, channels, frequency, bit_depth, read_ahead):
+    """
+    Creates the stream decoder for any source `stream()` accepts.
+
+    Returns:
+        tuple: The decoder and a name for telemetry.
+    """
+    if _is_path(source):
+        return _create_decoded(source, extension, 'stream')[1], str(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, 'read'):
+        if read_ahead and not isinstance(source, io.BytesIO):
+            source = _ReadAheadFile(source, read_ahead)
+    elif hasattr(source, '__iter__'):
+        if channels is None or frequency is None:
+            raise OalError("Streaming from an iterable of PCM chunks requires channels and frequency.")
+        return PCMIterableStream(source, channels, frequency, bit_depth), type(source).__name__
     else:
-        raise OalError(f"Unsupported file format: {extension}. Or required library (PyOgg) is not installed.")
+        raise TypeError("source must be a path, bytes-like object, binary file-like object or iterable.")
+    name = getattr(source, 'name', None)
+    return _create_decoded(source, extension, 'stream')[1], str(name) if name else type(source).__name__
 
-def stream(filepath, extension=None, buffer_count=3, buffer_size=4096 * 8):
+def _register_stream(source_stream, manager):
+    """
+    Registers a stream with a StreamManager as the `manager` argument of
+    `stream()` asks.
+
+    Returns:
+        The stream, for chaining.
+    """
+    if manager:
+        if manager is True:
+            manager = get_stream_manager()
+        manager.add(source_stream)
+    return source_stream
+
+def stream(filepath, extension=None, buffer_count=3, buffer_size=4096 * 8, manager=None, decode_ahead=0,
+           adaptive=None, loop=False, loop_start=0, loop_end=None, channels=None, frequency=None, bit_depth=16,
+           read_ahead=65536, pull=False):
     """
     Opens an audio file for streaming and returns a SourceStream.
 
+    The decoder is chosen from the decoder registry in the same way as for
+    `open()`.
+
+    Besides a path, `filepath` may be:
+
+    - a bytes-like object (bytes, bytearray, memoryview) holding an encoded
+      file, which is decoded straight from memory;
+    - a binary file-like object, such as a member opened from a zip or pack
+      file. It is read through a read-ahead buffer and must be seekable for
+      formats whose decoder needs to seek;
+    - an iterable of raw, interleaved PCM chunks, such as a generator. Then
+      `channels` and `frequency` are required.
+
     Args:
-        filepath (str): Path to the audio file.
+        filepath (str, bytes-like, file-like or iterable): The audio to stream.
         extension (str, optional): File extension hint (e.g., '.wav', '.ogg').
                                    Defaults to detecting from filepath.
         buffer_count (int, optional): The number of internal buffers to use for
                                       streaming. Defaults to 3.
         buffer_size (int, optional): The size of each internal buffer in bytes.
                                      Defaults to 32768.
+        manager (bool or StreamManager, optional): If True, the stream is
+            registered with the shared background StreamManager (see
+            `py_openal.stream_manager.get_stream_manager`), so `update()`
+            does not need to be called. A StreamManager instance may be
+            passed instead. Defaults to None (update manually).
+        decode_ahead (int, optional): Number of chunks to decode ahead on a
+            background worker, so that refills never wait for the decoder.
+            Defaults to 0 (decode during `update()`).
+        adaptive (AdaptiveBuffering or bool, optional): Lets the stream tune
+            its buffer count and size at runtime. True uses the default
+            bounds. Defaults to None (fixed buffering).
+        loop (bool, optional): Loop the file seamlessly instead of finishing.
+                               Defaults to False.
+        loop_start (int, optional): Sample frame the loop returns to; the
+            frames before it play once as an intro. Defaults to 0.
+        loop_end (int, optional): Sample frame at which the loop wraps.
+                                  Defaults to the end of the file.
+        channels (int, optional): Channel count of PCM chunks from an iterable.
+        frequency (int, optional): Sample rate of PCM chunks from an iterable.
+        bit_depth (int, optional): Sample size of PCM chunks from an iterable:
+                                   8, 16 or 32 (float). Defaults to 16.
+        read_ahead (int, optional): Bytes read at a time from a file-like
+            object. 0 reads it directly. Defaults to 65536.
+        pull (bool, optional): If True and the AL_SOFT_callback_buffer
+            extension is present, return a CallbackStream that OpenAL pulls
+            from a ring buffer of `buffer_count * buffer_size` bytes, filled
+            by a decoder thread. `decode_ahead` and `adaptive` do not apply
+            to it. Without the extension a SourceStream is returned.
+            Defaults to False.
 
     Returns:
-        A pyopenal.SourceStream object ready for playback.
+        A pyopenal.SourceStream (or CallbackStream) object ready for playback.
     """
     _ensure_context()
-    if extension is None:
-        extension = os.path.splitext(filepath)[1].lower()
+    audio_stream, name = _open_stream_source(filepath, extension, channels, frequency, bit_depth, read_ahead)
+    if pull and al.alIsExtensionPresent(b"AL_SOFT_callback_buffer"):
+        from .callback_stream import CallbackStream
+        source_stream = CallbackStream(audio_stream, ring_size=buffer_count * buffer_size, chunk_size=buffer_size,
+                                       loop=loop, loop_start=loop_start, loop_end=loop_end)
+    else:
+        source_stream = SourceStream(audio_stream, buffer_count=buffer_count, buffer_size=buffer_size,
+                                     decode_ahead=decode_ahead, adaptive=adaptive,
+                                     loop=loop, loop_start=loop_start, loop_end=loop_end)
+    source_stream.telemetry.name = name
+    return _register_stream(source_stream, manager)
+
 
-    if extension == '.wav':
-        audio_stream = WaveFileStream(filepath)
-        return SourceStream(audio_stream, buffer_count=buffer_count, buffer_size=buffer_size)
-    elif PYOGG_OK and extension in ('.ogg', '.opus'):
-        audio_stream = VorbisFileStream(filepath) if extension == '.ogg' else OpusFileStream(filepath)
-        return SourceStream(audio_stream, buffer_count=buffer_count, buffer_size=buffer_size)
-    elif MINIAUDIO_OK and extension in ('.mp3', '.flac'):
-        audio_stream = MiniAudioStream(filepath)
-        return SourceStream(audio_stream, buffer_count=buffer_count, buffer_size=buffer_size)
+# Bytes per sample for each sample type a decoder can be asked for.
+_SAMPLE_TYPE_BYTES = {
+    SampleType.UNSIGNED_BYTE: 1,
+    SampleType.SHORT: 2,
+    SampleType.FLOAT: 4,
+}
+
+def playlist(filepaths, extension=None, buffer_count=3, buffer_size=4096 * 8, manager=None, decode_ahead=0,
+             adaptive=None):
+    """
+    Streams several audio files back to back through one source.
+
+    Tracks of the same format play without a gap; see
+    `py_openal.playlist.PlaylistStream`.
+
+    Args:
+        filepaths (iterable[str]): Paths of the tracks, in playback order.
+        extension (str, optional): File extension hint for every track.
+                                   Defaults to detecting from each path.
+        buffer_count (int, optional): The number of internal buffers to use for
+                                      streaming. Defaults to 3.
+        buffer_size (int, optional): The size of each internal buffer in bytes.
+                                     Defaults to 32768.
+        manager (bool or StreamManager, optional): As for `stream()`.
+        decode_ahead (int, optional): As for `stream()`.
+        adaptive (AdaptiveBuffering or bool, optional): As for `stream()`.
+
+    Returns:
+        A PlaylistStream object ready for playback.
+    """
+    _ensure_context()
+
+    def open_track(filepath):
+        return _create_decoded(filepath, extension, 'stream')[1]
+
+    playlist_stream = PlaylistStream(filepaths, open_track, buffer_count=buffer_count, buffer_size=buffer_size,
+                                     decode_ahead=decode_ahead, adaptive=adaptive)
+    playlist_stream.telemetry.name = 'playlist'
+    return _register_stream(playlist_stream, manager)
+
+def stem_group(filepaths, extension=None, buffer_count=3, buffer_frames=8192, manager=None, decode_ahead=0,
+               loop=False, start_delay=0.0, drift_tolerance=0, channels=None, frequency=None, bit_depth=16,
+               read_ahead=65536):
+    """
+    Streams the stems of one piece of music in sample lock.
+
+    See `py_openal.stems.StemGroup`. Call `play()` on the returned group
+    to start all stems together.
+
+    Args:
+        filepaths (list or dict): The stems, as anything `stream()` accepts.
+            A dict maps stem names to them.
+        extension (str, optional): File extension hint for every stem.
+        buffer_count (int, optional): Streaming buffers per stem. Defaults to 3.
+        buffer_frames (int, optional): Sample frames per buffer. Defaults to 8192.
+        manager (bool or StreamManager, optional): As for `stream()`; the
+            group is registered as a whole.
+        decode_ahead (int, optional): As for `stream()`.
+        loop (bool, optional): Loop every stem. Defaults to False.
+        start_delay (float, optional): See StemGroup. Defaults to 0.
+        drift_tolerance (int, optional): See StemGroup. Defaults to 0.
+        channels (int, optional): As for `stream()`.
+        frequency (int, optional): As for `stream()`.
+        bit_depth (int, optional): As for `stream()`. Defaults to 16.
+        read_ahead (int, optional): As for `stream()`. Defaults to 65536.
+
+    Returns:
+        A StemGroup with every stem's buffers filled.
+    """
+    _ensure_context()
+
+    def open_stem(source):
+        return _open_stream_source(source, extension, channels, frequency, bit_depth, read_ahead)[0]
+
+    if isinstance(filepaths, dict):
+        audio_files = {name: open_stem(path) for name, path in filepaths.items()}
     else:
-        raise OalError(f"Unsupported file format for streaming: {extension}. Or required library (PyOgg) is not installed.")
+        audio_files = [open_stem(path) for path in filepaths]
+    group = StemGroup(audio_files, buffer_count=buffer_count, buffer_frames=buffer_frames,
+                      decode_ahead=decode_ahead, loop=loop, start_delay=start_delay,
+                      drift_tolerance=drift_tolerance)
+    return _register_stream(group, manager)
+
+
+class LoadPolicy:
+    """
+    Thresholds used by `load()` to choose between resident and streamed playback.
+
+    A file is loaded resident (fully decoded into one Buffer) when both its
+    duration and its decoded size are within the limits. Otherwise it is
+    streamed.
+    """
+    def __init__(self, max_resident_seconds=10.0, max_resident_bytes=4 * 1024 * 1024,
+                 compression_ratio=10.0, buffer_count=3, buffer_size=4096 * 8, compress=None):
+        """
+        Args:
+            max_resident_seconds (float, optional): Longest duration to load
+                resident. Defaults to 10 seconds.
+            max_resident_bytes (int, optional): Largest decoded size to load
+                resident. Defaults to 4 MiB.
+            compression_ratio (float, optional): Decoded-to-file size ratio used
+                to estimate the decoded size when the header does not state the
+                length. Defaults to 10.
+            buffer_count (int, optional): Buffer count for streamed playback.
+            buffer_size (int, optional): Buffer size for streamed playback.
+            compress (str, optional): Compressed format for resident sounds,
+                as accepted by `open()`. Defaults to None (PCM).
+        """
+        self.max_resident_seconds = max_resident_seconds
+        self.max_resident_bytes = max_resident_bytes
+        self.compression_ratio = compression_ratio
+        self.buffer_count = buffer_count
+        self.buffer_size = buffer_size
+        self.compress = compress
+
+    def should_stream(self, info, decoded_size):
+        """
+        Decides whether a file should be streamed.
+
+        Args:
+            info (AudioInfo or None): The file's header information.
+            decoded_size (int): The (estimated) decoded size in bytes.
+
+        Returns:
+            bool: True to stream, False to load resident.
+        """
+        if decoded_size > self.max_resident_bytes:
+            return True
+        if info is not None and info.frames and info.frequency:
+            return info.frames / info.frequency > self.max_resident_seconds
+        return False
+
+# Named policies accepted by load().
+_POLICIES = {
+    'resident': LoadPolicy(max_resident_seconds=float('inf'), max_resident_bytes=float('inf')),
+    'stream': LoadPolicy(max_resident_seconds=0.0, max_resident_bytes=-1),
+}
+
+def get_audio_info(filepath, extension=None):
+    """
+    Reads a file's channels, frequency, bit depth and length from its header.
+
+    Args:
+        filepath (str): Path to the audio file.
+        extension (str, optional): File extension hint.
+
+    Returns:
+        AudioInfo or None: The header information, or None if no decoder for
+                           this file can probe it.
+    """
+    for decoder in find_decoders(filepath, extension, 'load') + find_decoders(filepath, extension, 'stream'):
+        if decoder.probe is not None:
+            return decoder.probe(filepath)
+    return None
+
+def _estimate_decoded_size(filepath, extension, info, policy):
+    """Estimates the size in bytes a file would occupy as a resident buffer."""
+    decoders = find_decoders(filepath, extension, 'load')
+    sample_type = decoders[0].choose_sample_type(_supported_sample_types(), filepath) if decoders else None
+    if info is not None and info.frames:
+        sample_bytes = _SAMPLE_TYPE_BYTES.get(sample_type, max(1, info.bit_depth // 8))
+        return info.frames * info.channels * sample_bytes
+    return int(os.path.getsize(filepath) * policy.compression_ratio)
+
+def load(filepath, policy=None, extension=None, manager=None):
+    """
+    Opens an audio file with resident or streamed playback, whichever suits it.
+
+    The file's header is inspected for its duration and decoded size, and the
+    policy's thresholds decide between `open()` (one fully decoded buffer) and
+    `stream()` (a SourceStream). Short clips stay resident, long music is
+    streamed.
+
+    Both results are Sources with the same playback interface. Call `update()`
+    on the returned object regularly: it refills a SourceStream and is a
+    no-op for a resident Source. Alternatively pass `manager` to have a
+    streamed result refilled in the background.
+
+    Args:
+        filepath (str): Path to the audio file.
+        policy (LoadPolicy or str, optional): A LoadPolicy, or one of 'auto',
+            'resident' or 'stream'. Defaults to 'auto' (a default LoadPolicy).
+        extension (str, optional): File extension hint (e.g., '.wav', '.ogg').
+        manager (bool or StreamManager, optional): Passed to `stream()` when
+            the file is streamed.
+
+    Returns:
+        Source or SourceStream: A source ready for playback.
+    """
+    if policy is None or policy == 'auto':
+        policy = LoadPolicy()
+    elif isinstance(policy, str):
+        try:
+            policy = _POLICIES[policy]
+        except KeyError:
+            raise ValueError(f"Unknown load policy: {policy!r}. Use 'auto', 'resident' or 'stream'.")
+
+    _ensure_context()
+    info = get_audio_info(filepath, extension)
+    decoded_size = _estimate_decoded_size(filepath, extension, info, policy)
+    if policy.should_stream(info, decoded_size):
+        return stream(filepath, extension, buffer_count=policy.buffer_count, buffer_size=policy.buffer_size,
+                      manager=manager)
+    return open(filepath, extension, compress=policy.compress)
@@ -0,0 +1,185 @@
+import threading
+from collections import namedtuple
+from . import alc
+from .exceptions import OalError
+
+# A snapshot of a ledger's counters.
+LedgerStats = namedtuple('LedgerStats', ['total', 'high_water_mark', 'budget', 'buffer_count', 'by_tag'])
+
+DEFAULT_TAG = 'default'
+
+class BufferLedger:
+    """
+    Tracks the memory used by OpenAL buffers in one context.
+
+    Every Buffer records its uploaded byte size here under a tag (a free-form
+    category such as 'music' or 'sfx'). The ledger keeps running totals per
+    tag, remembers the high-water mark, and can enforce an optional budget.
+
+    When an upload would exceed the budget, the registered evictors are asked
+    to free memory (for example by dropping idle cached buffers). If that is
+    not enough, the upload is refused with an OalError.
+    """
+    def __init__(self, budget=None):
+        """
+        Args:
+            budget (int, optional): Maximum number of bytes the buffers in this
+                                    context may use. None means unlimited.
+        """
+        self.budget = budget
+        self._entries = {}  # buffer id -> (size, tag)
+        self._by_tag = {}
+        self._total = 0
+        self._high_water_mark = 0
+        self._evictors = []
+        self._high_water_callback = None
+        self._lock = threading.RLock()
+
+    @property
+    def total(self) -> int:
+        """The number of bytes currently held by tracked buffers."""
+        return self._total
+
+    @property
+    def high_water_mark(self) -> int:
+        """The largest total observed since creation or the last reset."""
+        return self._high_water_mark
+
+    def totals_by_tag(self) -> dict:
+        """Returns a dictionary mapping each tag to its byte total."""
+        with self._lock:
+            return dict(self._by_tag)
+
+    def size_of(self, buffer_id) -> int:
+        """Returns the recorded size of a buffer, or 0 if it is not tracked."""
+        entry = self._entries.get(buffer_id)
+        return entry[0] if entry else 0
+
+    def get_stats(self) -> LedgerStats:
+        """Returns a snapshot of the ledger's counters."""
+        with self._lock:
+            return LedgerStats(self._total, self._high_water_mark, self.budget,
+                               len(self._entries), dict(self._by_tag))
+
+    def reset_high_water_mark(self):
+        """Resets the high-water mark to the current total."""
+        with self._lock:
+            self._high_water_mark = self._total
+
+    def set_high_water_callback(self, callback):
+        """
+        Registers a function to be called whenever a new high-water mark is set.
+
+        Args:
+            callback (callable): A function accepting `(ledger, total)`. Pass
+                                 None to unregister.
+        """
+        if callback is not None and not callable(callback):
+            raise TypeError("The provided callback must be a callable function or None.")
+        self._high_water_callback = callback
+
+    def add_evictor(self, evictor):
+        """
+        Registers a function that can free memory when the budget is exceeded.
+
+        Args:
+            evictor (callable): A function accepting the number of bytes that
+                                must be freed. It should destroy buffers it
+                                owns (which releases them from the ledger).
+        """
+        if not callable(evictor):
+            raise TypeError("evictor must be callable.")
+        with self._lock:
+            if evictor not in self._evictors:
+                self._evictors.append(evictor)
+
+    def remove_evictor(self, evictor):
+        """Unregisters an evictor previously added with add_evictor()."""
+        with self._lock:
+            if evictor in self._evictors:
+                self._evictors.remove(evictor)
+
+    def ensure_capacity(self, buffer_id, size):
+        """
+        Makes room for `size` bytes in `buffer_id`, evicting if necessary.
+
+        Raises:
+            OalError: If the budget cannot accommodate the upload.
+        """
+        with self._lock:
+            if self.budget is None:
+                return
+            needed = self._total - self.size_of(buffer_id) + size - self.budget
+            if needed <= 0:
+                return
+            evictors = list(self._evictors)
+        # Evictors take their owner's lock and destroy buffers, which comes
+        # back into the ledger. Calling them without holding the ledger lock
+        # keeps the lock order the same as for a cache that uploads.
+        for evictor in evictors:
+            evictor(needed)
+            with self._lock:
+                needed = self._total - self.size_of(buffer_id) + size - self.budget
+            if needed <= 0:
+                return
+        raise OalError(f"Buffer memory budget exceeded: uploading {size} bytes would use "
+                       f"{self.budget + needed} of {self.budget} bytes.")
+
+    def record(self, buffer_id, size, tag=None):
+        """Records (or updates) the size of a buffer after a successful upload."""
+        if tag is None:
+            tag = DEFAULT_TAG
+        callback = None
+        with self._lock:
+            self._remove_entry(buffer_id)
+            self._entries[buffer_id] = (size, tag)
+            self._by_tag[tag] = self._by_tag.get(tag, 0) + size
+            self._total += size
+            if self._total > self._high_water_mark:
+                self._high_water_mark = self._total
+                callback = self._high_water_callback
+        if callback is not None:
+            callback(self, self._total)
+
+    def release(self, buffer_id):
+        """Removes a buffer from the ledger, typically when it is destroyed."""
+        with self._lock:
+            self._remove_entry(buffer_id)
+
+    def _remove_entry(self, buffer_id):
+        entry = self._entries.pop(buffer_id, None)
+        if entry is None:
+            return
+        size, tag = entry
+        self._total -= size
+        # Empty buffers have no bytes under their tag, which may already be
+        # gone.
+        remaining = self._by_tag.get(tag, 0) - size
+        if remaining:
+            self._by_tag[tag] = remaining
+        else:
+            self._by_tag.pop(tag, None)
+
+
+# Ledgers for raw context handles that have no Context object, e.g. contexts
+# created directly through the alc module.
+_unmanaged_ledgers = {}
+
+def get_buffer_ledger():
+    """
+    Returns the BufferLedger of the current context.
+
+    Returns:
+        BufferLedger: The ledger tracking buffers created in the current context.
+    """
+    from .context import _context_registry
+
+    handle = alc.alcGetCurrentContext()
+    context = _context_registry.get(handle)
+    if context is not None:
+        return context.buffer_ledger
+
+    ledger = _unmanaged_ledgers.get(handle)
+    if ledger is None:
+        ledger = _unmanaged_ledgers[handle] = BufferLedger()
+    return ledger
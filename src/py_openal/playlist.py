@@ -0,0 +1,232 @@
+from collections import deque
+from .stream import SourceStream, _channels_to_al_format
+from .decode_ahead import DecodeAheadStream
+from .enums import PlaybackState
+from .exceptions import OalError
+
+
+def _stream_format(audio_file):
+    """The (channels, bits, frequency) triple that must match across queued buffers."""
+    return audio_file.channels, getattr(audio_file, 'bit_depth', 16), audio_file.frequency
+
+def _close(audio_file):
+    close = getattr(audio_file, 'close', None)
+    if close is not None:
+        close()
+
+class PlaylistStream(SourceStream):
+    """
+    A SourceStream that plays a list of tracks back to back on one source.
+
+    The next track's decoder is opened while the current one is still
+    playing, and its buffers are queued right behind the current track's,
+    so OpenAL plays the transition without a gap. Buffers never span two
+    tracks, which makes the track boundary the point where a buffer
+    completes: `update()` reports it through the track change callback.
+
+    OpenAL cannot queue buffers of different formats on one source. When
+    the next track has a different channel count, sample size or frequency,
+    the current track is played out first and the new one starts on a
+    clean boundary, which leaves a short gap.
+    """
+    def __init__(self, tracks, open_track, buffer_count=3, buffer_size=4096 * 8, decode_ahead=0, adaptive=None):
+        """
+        Args:
+            tracks (iterable): The tracks, in playback order. Usually paths.
+            open_track (callable): A function that takes a track and returns
+                a stream decoder for it (an object with `channels`,
+                `frequency`, `bit_depth` and `get_buffer()`).
+            buffer_count (int, optional): Number of streaming buffers.
+                                          Defaults to 3.
+            buffer_size (int, optional): Size of each buffer in bytes.
+                                         Defaults to 32768.
+            decode_ahead (int, optional): Chunks to decode ahead on a
+                background worker, per track. Defaults to 0.
+            adaptive (AdaptiveBuffering or bool, optional): See SourceStream.
+        """
+        self._tracks = list(tracks)
+        if not self._tracks:
+            raise OalError("A playlist needs at least one track.")
+        self._open_track = open_track
+        self._decode_ahead = decode_ahead
+        # The track being decoded and the track being heard. They differ
+        # while the next track's buffers wait behind the current one's.
+        self._current_index = 0
+        self._playing_index = 0
+        self._next_file = None
+        # Track index of every queued buffer, parallel to _queued_sizes.
+        self._queued_tracks = deque()
+        # The track of the last unqueued buffer, and the frames of that
+        # track unqueued so far. They place frame_position at a boundary.
+        self._unqueued_track = 0
+        self._unqueued_frames = 0
+        self._track_callback = None
+        self._restart_after_switch = False
+        super().__init__(open_track(self._tracks[0]), buffer_count=buffer_count, buffer_size=buffer_size,
+                         decode_ahead=decode_ahead, adaptive=adaptive)
+
+    @property
+    def tracks(self):
+        """A list of the playlist's tracks."""
+        with self._lock:
+            return list(self._tracks)
+
+    @property
+    def track_index(self) -> int:
+        """The index of the track being heard."""
+        return self._playing_index
+
+    @property
+    def track(self):
+        """The track being heard."""
+        return self._tracks[self._playing_index]
+
+    def append(self, track):
+        """Adds a track to the end of the playlist, even while it plays."""
+        with self._lock:
+            self._tracks.append(track)
+            if self._is_finished and self._is_active:
+                # The last track had already run out; carry on with the new one.
+                self._is_finished = False
+
+    def set_track_change_callback(self, callback):
+        """
+        Registers a function to be called when playback crosses into the
+        next track.
+
+        Args:
+            callback (callable): A function accepting `(stream, index)`,
+                                 where `index` is the track now playing. It
+                                 runs in `update()`. Pass None to unregister.
+
+        The boundary is only seen by the first `update()` after the previous
+        track's last buffer has played, so the callback runs up to one
+        update interval late (a StreamManager's `period`, 10 ms by default).
+        During the callback, `frame_position` is the number of frames of
+        the new track already played, which places the boundary exactly:
+        it was `frame_position / frequency` seconds ago.
+        """
+        if callback is not None and not callable(callback):
+            raise TypeError("The provided callback must be a callable function or None.")
+        self._track_callback = callback
+
+    def _open(self, index):
+        audio_file = self._open_track(self._tracks[index])
+        if self._decode_ahead:
+            frame_size = audio_file.channels * (getattr(audio_file, 'bit_depth', 16) // 8)
+            chunk_size = max(frame_size, self.buffer_size - self.buffer_size % frame_size)
+            audio_file = DecodeAheadStream(audio_file, chunk_size, depth=self._decode_ahead,
+                                           decode_time=self.telemetry.decode_time)
+        return audio_file
+
+    def _prepare_next(self):
+        """Opens the next track's decoder if it is not open yet."""
+        if self._next_file is None and self._current_index + 1 < len(self._tracks):
+            self._next_file = self._open(self._current_index + 1)
+
+    def _read_chunk(self, blocking=False):
+        data = super()._read_chunk(blocking)
+        while data == b'':
+            if self._current_index + 1 >= len(self._tracks):
+                return b''
+            self._prepare_next()
+            format_changed = _stream_format(self._next_file) != _stream_format(self.audio_file)
+            if format_changed and self._queued_sizes:
+                # Wait until the current track has played out.
+                return None
+            _close(self.audio_file)
+            self.audio_file = self._next_file
+            self._next_file = None
+            self._current_index += 1
+            if format_changed:
+                self._switch_format()
+            data = super()._read_chunk(blocking)
+        if data:
+            self._prepare_next()
+        return data
+
+    def _switch_format(self):
+        """Adopts the current decoder's format once the queue is empty."""
+        bits = getattr(self.audio_file, 'bit_depth', 16)
+        self.al_format = _channels_to_al_format(self.audio_file.channels, bits)
+        self._frame_size = self.audio_file.channels * (bits // 8)
+        self._set_buffer_size(self.buffer_size)
+        if self.state == PlaybackState.STOPPED:
+            # The source ran dry at the boundary. Rewinding keeps update()
+            # from counting it as an underrun; playback resumes after the refill.
+            self.rewind()
+            self._restart_after_switch = True
+
+    def _fill_buffer(self, buf_id, blocking=False):
+        queued = super()._fill_buffer(buf_id, blocking)
+        if queued:
+            self._queued_tracks.append(self._current_index)
+        return queued
+
+    def _unqueue_processed(self, count):
+        frame_size = self._frame_size
+        for i in range(count):
+            track = self._queued_tracks[i]
+            if track != self._unqueued_track:
+                self._unqueued_track = track
+                self._unqueued_frames = 0
+            self._unqueued_frames += self._queued_sizes[i] // frame_size
+        super()._unqueue_processed(count)
+        for _ in range(count):
+            self._queued_tracks.popleft()
+        self._check_boundary()
+
+    def _check_boundary(self):
+        """Fires the track change callback once the next track's first buffer is playing."""
+        if self._queued_tracks:
+            heard = self._queued_tracks[0]
+        else:
+            # The queue ran dry; the last buffer played is the one heard.
+            heard = self._unqueued_track
+        if heard == self._playing_index:
+            return
+        previous = self._playing_index
+        self._playing_index = heard
+        # Buffers never span tracks, so the new track's position is the
+        # frames of its buffers already unqueued, if any.
+        self._base_frame = self._unqueued_frames if heard == self._unqueued_track else 0
+        callback = self._track_callback
+        if callback is not None:
+            for index in range(previous + 1, self._playing_index + 1):
+                callback(self, index)
+
+    def _update(self):
+        active = super()._update()
+        if self._restart_after_switch and self._queued_sizes:
+            self._restart_after_switch = False
+            self.play()
+        self._check_boundary()
+        return active
+
+    def seek(self, seconds):
+        """
+        Moves playback to a position in the track being heard.
+
+        See `SourceStream.seek`. Any buffers already queued from the next
+        track are discarded and refilled after the seek.
+        """
+        with self._lock:
+            if self._id_value is not None and self._current_index != self._playing_index:
+                # Decoding has moved on to a later track; reopen the playing one.
+                _close(self._next_file)
+                _close(self.audio_file)
+                self._next_file = None
+                self._current_index = self._playing_index
+                self.audio_file = self._open(self._playing_index)
+            self._queued_tracks.clear()
+            self._unqueued_track = self._playing_index
+            self._unqueued_frames = 0
+            return super().seek(seconds)
+
+    def destroy(self):
+        """Stops the playlist and releases all OpenAL resources and decoders."""
+        with self._lock:
+            if self._next_file is not None:
+                _close(self._next_file)
+                self._next_file = None
+            super().destroy()
@@ -0,0 +1,198 @@
+import ctypes
+import threading
+from collections import namedtuple
+
+# A snapshot of a RingBuffer's fill level and counters. `fill_level` is the
+# fraction of the capacity holding unread data.
+RingStats = namedtuple('RingStats', ['capacity', 'available', 'fill_level', 'bytes_written', 'bytes_read',
+                                     'underruns', 'underrun_bytes'])
+
+class RingBuffer:
+    """
+    A fixed-size, single-producer, single-consumer ring of audio bytes.
+
+    The producer (a decoder thread) calls `write()`, which waits while the
+    ring is full. The consumer, usually an OpenAL buffer callback on the
+    mixer thread, calls `read_into()`, which copies straight to the
+    destination with `memmove`. The consumer never takes a lock and never
+    allocates, so it cannot be held up by the producer.
+
+    Each side only advances its own byte counter, and the fill level is
+    the difference between them.
+    """
+    def __init__(self, capacity, poll_interval=0.002):
+        """
+        Args:
+            capacity (int): Size of the ring in bytes.
+            poll_interval (float, optional): Seconds between checks for free
+                space while `write()` waits. The consumer does not signal
+                the producer, so that it never has to take a lock. Defaults
+                to 0.002.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive.")
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self._storage = ctypes.create_string_buffer(capacity)
+        self._address = ctypes.addressof(self._storage)
+        self._view = memoryview(self._storage).cast('B')
+        self._written = 0
+        self._read = 0
+        self._finished = False
+        self._closed = False
+        # Updated by the consumer only.
+        self.underruns = 0
+        self.underrun_bytes = 0
+        # Wakes threads waiting for data in `wait_for_data()`. Only the
+        # producer notifies it.
+        self._data_cond = threading.Condition()
+
+    @property
+    def available(self) -> int:
+        """Bytes that can be read."""
+        return self._written - self._read
+
+    @property
+    def free(self) -> int:
+        """Bytes that can be written without waiting."""
+        return self.capacity - (self._written - self._read)
+
+    @property
+    def fill_level(self) -> float:
+        """The fraction of the ring holding unread data, from 0 to 1."""
+        return (self._written - self._read) / self.capacity
+
+    @property
+    def finished(self) -> bool:
+        """True once the producer has called `finish()`."""
+        return self._finished
+
+    @property
+    def drained(self) -> bool:
+        """True once the producer has finished and everything has been read."""
+        return self._finished and self._written == self._read
+
+    def write(self, data, timeout=None):
+        """
+        Copies all of `data` into the ring, waiting for space as needed.
+
+        Args:
+            data (bytes-like): The bytes to write.
+            timeout (float, optional): Maximum seconds to wait for space.
+
+        Returns:
+            bool: True if everything was written, False if the ring was
+                  closed or the timeout expired first.
+        """
+        view = memoryview(data).cast('B')
+        total = len(view)
+        offset = 0
+        waited = 0.0
+        while offset < total:
+            if self._closed:
+                return False
+            count = min(self.free, total - offset)
+            if not count:
+                if timeout is not None and waited >= timeout:
+                    return False
+                with self._data_cond:
+                    self._data_cond.wait(self.poll_interval)
+                waited += self.poll_interval
+                continue
+            position = self._written % self.capacity
+            first = min(count, self.capacity - position)
+            self._view[position:position + first] = view[offset:offset + first]
+            if count > first:
+                self._view[:count - first] = view[offset + first:offset + count]
+            # Publish only after the bytes are in place.
+            self._written += count
+            offset += count
+            with self._data_cond:
+                self._data_cond.notify_all()
+        return True
+
+    def read_into(self, address, size) -> int:
+        """
+        Copies up to `size` bytes to a memory address.
+
+        Args:
+            address (int): The destination address.
+            size (int): The maximum number of bytes to copy.
+
+        Returns:
+            int: The number of bytes copied.
+        """
+        count = min(size, self._written - self._read)
+        if count <= 0:
+            return 0
+        position = self._read % self.capacity
+        first = min(count, self.capacity - position)
+        ctypes.memmove(address, self._address + position, first)
+        if count > first:
+            ctypes.memmove(address + first, self._address, count - first)
+        self._read += count
+        return count
+
+    def read_into_padded(self, address, size, silence=0) -> int:
+        """
+        Copies `size` bytes to a memory address, padding with `silence`
+        bytes if the ring runs short before the producer has finished.
+        Each padded read is counted as an underrun.
+
+        Args:
+            address (int): The destination address.
+            size (int): The number of bytes wanted.
+            silence (int, optional): The byte value to pad with: 0x80 for
+                unsigned 8-bit samples, 0 otherwise. Defaults to 0.
+
+        Returns:
+            int: `size`, or fewer once the producer has finished and the
+                 remaining data has been copied.
+        """
+        # Read the flag first: data written before finish() is then
+        # certain to be copied by this call.
+        finished = self._finished
+        count = self.read_into(address, size)
+        if count < size and not finished:
+            ctypes.memset(address + count, silence, size - count)
+            self.underruns += 1
+            self.underrun_bytes += size - count
+            return size
+        return count
+
+    def read(self, size) -> bytes:
+        """Returns up to `size` bytes as a new bytes object."""
+        out = ctypes.create_string_buffer(min(size, self.available))
+        count = self.read_into(ctypes.addressof(out), len(out))
+        return out.raw[:count]
+
+    def wait_for_data(self, size, timeout=None) -> bool:
+        """
+        Waits until at least `size` bytes are available, or the producer
+        has finished or the ring has been closed.
+
+        Returns:
+            bool: True if the condition was met before the timeout.
+        """
+        size = min(size, self.capacity)
+        with self._data_cond:
+            return self._data_cond.wait_for(
+                lambda: self.available >= size or self._finished or self._closed, timeout)
+
+    def get_stats(self) -> RingStats:
+        """Returns a snapshot of the fill level and counters."""
+        written, read = self._written, self._read
+        return RingStats(self.capacity, written - read, (written - read) / self.capacity, written, read,
+                         self.underruns, self.underrun_bytes)
+
+    def finish(self):
+        """Marks the end of the data. Called by the producer."""
+        self._finished = True
+        with self._data_cond:
+            self._data_cond.notify_all()
+
+    def close(self):
+        """Makes pending and future writes return False."""
+        self._closed = True
+        with self._data_cond:
+            self._data_cond.notify_all()
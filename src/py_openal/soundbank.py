@@ -0,0 +1,286 @@
+import builtins
+import ctypes
+import json
+import mmap
+import os
+import struct
+from collections import namedtuple
+from .buffer import Buffer
+from .source import Source
+from .enums import AudioFormat, SampleType
+from .exceptions import OalError
+from .decoders import find_decoders
+from .resample import resample_pcm
+from .compression import compress_pcm
+
+BANK_MAGIC = b'PYALBANK'
+BANK_VERSION = 1
+
+# magic, version, index length in bytes, absolute offset of the clip data
+_HEADER = struct.Struct('<8sIIQ')
+
+# Clip data is aligned so every slice starts on a 16-byte boundary.
+_ALIGNMENT = 16
+
+# One clip in a sound bank. `offset` is relative to the start of the data
+# section, `length` is in bytes. `block_alignment` is only set for
+# block-compressed clips that do not use their format's default alignment.
+SoundBankEntry = namedtuple('SoundBankEntry', ['name', 'format', 'frequency', 'offset', 'length', 'block_alignment'])
+
+# The buffer protocol's Py_buffer struct. ctypes' from_buffer() only accepts
+# writable buffers, so pointers into a read-only mapping are taken through
+# PyObject_GetBuffer instead.
+class _PyBuffer(ctypes.Structure):
+    _fields_ = [
+        ('buf', ctypes.c_void_p),
+        ('obj', ctypes.c_void_p),
+        ('len', ctypes.c_ssize_t),
+        ('itemsize', ctypes.c_ssize_t),
+        ('readonly', ctypes.c_int),
+        ('ndim', ctypes.c_int),
+        ('format', ctypes.c_char_p),
+        ('shape', ctypes.POINTER(ctypes.c_ssize_t)),
+        ('strides', ctypes.POINTER(ctypes.c_ssize_t)),
+        ('suboffsets', ctypes.POINTER(ctypes.c_ssize_t)),
+        ('internal', ctypes.c_void_p),
+    ]
+
+_PyObject_GetBuffer = ctypes.pythonapi.PyObject_GetBuffer
+_PyObject_GetBuffer.argtypes = [ctypes.py_object, ctypes.POINTER(_PyBuffer), ctypes.c_int]
+_PyObject_GetBuffer.restype = ctypes.c_int
+_PyBuffer_Release = ctypes.pythonapi.PyBuffer_Release
+_PyBuffer_Release.argtypes = [ctypes.POINTER(_PyBuffer)]
+_PyBuffer_Release.restype = None
+
+_PyBUF_SIMPLE = 0
+
+
+def _decode_clip(source, sample_types):
+    """Decodes a clip given as a file path, returning (format, data, frequency)."""
+    for decoder in find_decoders(source, None, 'load'):
+        sample_type = decoder.choose_sample_type(sample_types, source)
+        if sample_type is None:
+            continue
+        audio_file = decoder.load(source, sample_type)
+        return audio_file.al_format, bytes(audio_file.data), audio_file.frequency
+    raise OalError(f"No decoder available for sound bank clip: {source}")
+
+def build_sound_bank(output_path, clips, frequency=None,
+                     sample_types=(SampleType.SHORT, SampleType.UNSIGNED_BYTE),
+                     compress=None, block_alignment=None):
+    """
+    Packs many pre-decoded clips into a single sound bank file.
+
+    The bank stores a JSON index (name, format, rate, offset, length)
+    followed by the raw PCM of every clip. At runtime a SoundBank maps the
+    file into memory and creates buffers straight from it, so no per-clip
+    open, header parse or decode is needed.
+
+    This is an offline build step and does not need an OpenAL context.
+
+    Args:
+        output_path (str): Path of the bank file to write.
+        clips (dict or iterable): Maps clip names to either a file path, or
+            an `(AudioFormat, data, frequency)` tuple of already decoded PCM.
+            An iterable of `(name, clip)` pairs is also accepted.
+        frequency (int, optional): If given, every clip is resampled to this
+            rate (requires NumPy). Use the target device's mixing rate.
+        sample_types (iterable[SampleType], optional): Sample types decoders
+            may produce. Include SampleType.FLOAT only if the target
+            implementation supports AL_EXT_float32.
+        compress (str, optional): Store every clip compressed ('mulaw',
+            'alaw', 'ima4' or 'msadpcm'), see `py_openal.compression`. The
+            memory saved is reported by `get_compression_stats()`.
+        block_alignment (int, optional): ADPCM block size in sample frames.
+
+    Returns:
+        list[SoundBankEntry]: The index that was written.
+    """
+    items = clips.items() if isinstance(clips, dict) else clips
+
+    index = []
+    payloads = []
+    offset = 0
+    for name, clip in items:
+        if isinstance(clip, (str, os.PathLike)):
+            data_format, data, clip_frequency = _decode_clip(clip, tuple(sample_types))
+        else:
+            data_format, data, clip_frequency = clip
+            data = bytes(data)
+        data_format = AudioFormat(data_format)
+
+        if frequency is not None and clip_frequency != frequency:
+            data = resample_pcm(data, data_format, clip_frequency, frequency)
+            clip_frequency = frequency
+
+        clip_alignment = None
+        if compress is not None:
+            compressed = compress_pcm(data, data_format, compress, block_alignment)
+            data_format, data, clip_alignment = compressed.format, compressed.data, compressed.block_alignment
+
+        padding = -offset % _ALIGNMENT
+        offset += padding
+        payloads.append((padding, data))
+        index.append(SoundBankEntry(str(name), data_format, int(clip_frequency), offset, len(data), clip_alignment))
+        offset += len(data)
+
+    raw_index = []
+    for e in index:
+        item = {'name': e.name, 'format': int(e.format), 'frequency': e.frequency,
+                'offset': e.offset, 'length': e.length}
+        if e.block_alignment is not None:
+            item['block_alignment'] = e.block_alignment
+        raw_index.append(item)
+    index_bytes = json.dumps(raw_index).encode('utf-8')
+    data_offset = _HEADER.size + len(index_bytes)
+    data_offset += -data_offset % _ALIGNMENT
+
+    with builtins.open(output_path, 'wb') as f:
+        f.write(_HEADER.pack(BANK_MAGIC, BANK_VERSION, len(index_bytes), data_offset))
+        f.write(index_bytes)
+        f.write(b'\0' * (data_offset - _HEADER.size - len(index_bytes)))
+        for padding, data in payloads:
+            f.write(b'\0' * padding)
+            f.write(data)
+
+    return index
+
+
+class SoundBank:
+    """
+    A memory-mapped sound bank produced by `build_sound_bank()`.
+
+    Opening a bank only reads its index. A clip's Buffer is created on first
+    use, uploaded directly from the mapped file, and cached for later
+    plays. Clips that are never played cost only address space.
+    """
+    def __init__(self, path, tag='soundbank'):
+        """
+        Opens a sound bank.
+
+        Args:
+            path (str): Path to the bank file.
+            tag (str, optional): Memory accounting tag for the buffers created
+                                 from this bank. Defaults to 'soundbank'.
+        """
+        self.tag = tag
+        self._buffers = {}
+        self._file = builtins.open(path, 'rb')
+        try:
+            # A read-only mapping. A copy-on-write mapping would also let
+            # ctypes take pointers into it, but Windows reserves commit
+            # charge for the whole file up front.
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._entries = self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_index(self):
+        if len(self._map) < _HEADER.size:
+            raise OalError("File is too small to be a sound bank.")
+        magic, version, index_length, data_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != BANK_MAGIC:
+            raise OalError("Not a sound bank file (bad magic).")
+        if version != BANK_VERSION:
+            raise OalError(f"Unsupported sound bank version: {version}.")
+
+        self._data_offset = data_offset
+        raw_index = json.loads(self._map[_HEADER.size:_HEADER.size + index_length].decode('utf-8'))
+        entries = {}
+        for item in raw_index:
+            entry = SoundBankEntry(item['name'], AudioFormat(item['format']), item['frequency'],
+                                   item['offset'], item['length'], item.get('block_alignment'))
+            if data_offset + entry.offset + entry.length > len(self._map):
+                raise OalError(f"Sound bank clip '{entry.name}' extends past the end of the file.")
+            entries[entry.name] = entry
+        return entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    @property
+    def names(self):
+        """The names of all clips in the bank."""
+        return list(self._entries)
+
+    def get_entry(self, name) -> SoundBankEntry:
+        """Returns the index entry of a clip."""
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"No clip named '{name}' in sound bank.")
+
+    def is_loaded(self, name) -> bool:
+        """Returns True if a Buffer has already been created for the clip."""
+        return name in self._buffers
+
+    def get_buffer(self, name) -> Buffer:
+        """
+        Returns the Buffer for a clip, creating it on first use.
+
+        The data is uploaded from the mapped file without an intermediate copy
+        in Python.
+        """
+        buf = self._buffers.get(name)
+        if buf is not None:
+            return buf
+
+        if self._map is None:
+            raise OalError("Sound bank has been closed.")
+        entry = self.get_entry(name)
+
+        if not entry.length:
+            buf = Buffer(entry.format, b'', 0, entry.frequency, tag=self.tag,
+                         block_alignment=entry.block_alignment)
+        else:
+            # Take a pointer into the mapping, upload, and release the
+            # pointer so the mapping can still be closed later.
+            view = _PyBuffer()
+            if _PyObject_GetBuffer(self._map, ctypes.byref(view), _PyBUF_SIMPLE) != 0:
+                raise OalError("Could not take a pointer into the sound bank mapping.")
+            try:
+                buf = Buffer(entry.format, view.buf + self._data_offset + entry.offset, entry.length,
+                             entry.frequency, tag=self.tag, block_alignment=entry.block_alignment)
+            finally:
+                _PyBuffer_Release(ctypes.byref(view))
+
+        self._buffers[name] = buf
+        return buf
+
+    def create_source(self, name) -> Source:
+        """Creates a Source with the clip's buffer attached."""
+        return Source(self.get_buffer(name))
+
+    def unload(self, name):
+        """
+        Destroys the Buffer of a clip, if one was created.
+
+        Make sure no source is still using the buffer.
+        """
+        buf = self._buffers.pop(name, None)
+        if buf is not None:
+            buf.destroy()
+
+    def close(self):
+        """Destroys all created buffers and unmaps the file."""
+        for name in list(self._buffers):
+            self.unload(name)
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
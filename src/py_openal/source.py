@@ -24,6 +24,9 @@ class Source:
         self._buffer = None
         self._distance_model_cache = 'Default'
         self._direct_filter_cache = None
+        # Called with this source after it is destroyed, e.g. to release a
+        # shared buffer back to its cache.
+        self._destroy_callbacks = []
                 
         if buffer:
             self.buffer = buffer
@@ -42,6 +45,9 @@ class Source:
             temp_id = (ctypes.c_uint * 1)(self._id_value)
             al.alDeleteSources(1, temp_id)
             self._id_value = None
+            callbacks, self._destroy_callbacks = self._destroy_callbacks, []
+            for callback in callbacks:
+                callback(self)
 
     def set_auxiliary_send(self, effect_slot, send_index=0, filter=None):
         """
@@ -70,6 +76,18 @@ class Source:
         return self._id_value
 
 
+    def update(self):
+        """
+        Maintenance hook shared with SourceStream.
+
+        A static source needs no maintenance, so this only reports its state.
+        It lets code drive resident and streamed sources with the same loop.
+
+        Returns:
+            True if the source has not stopped, False otherwise.
+        """
+        return self.state != PlaybackState.STOPPED
+
     def play(self):
         """Starts or resumes playback."""
         al.alSourcePlay(self._id)
@@ -0,0 +1,298 @@
+import threading
+from . import al
+from .stream import SourceStream
+from .source_pool import play_sources, play_sources_at_time, pause_sources, stop_sources
+from .enums import PlaybackState
+from .exceptions import OalError
+from .helpers import seconds_to_nanoseconds
+
+class StemGroup:
+    """
+    Streams several stems of one piece of music in sample lock.
+
+    Every stem is a SourceStream, but the group refills them itself: all
+    stems queue buffers of the same number of frames, and a buffer is only
+    queued on one stem when every stem has one to queue. The stems are
+    started together with `play_sources` (or `play_sources_at_time`), so
+    they play the same frames in the same mixer pass.
+
+    Changing a stem's gain does not touch its queue, so it never affects
+    sync. If a stem underruns anyway, the group realigns all stems to the
+    furthest position and restarts them together. The spread of the stems'
+    positions, read through `sample_offset`, is reported as drift.
+
+    Do not call `update()` on the individual stems, or register them with a
+    StreamManager; update the group (or register the group) instead.
+    """
+    def __init__(self, audio_files, buffer_count=3, buffer_frames=8192, decode_ahead=0, loop=False,
+                 start_delay=0.0, drift_tolerance=0):
+        """
+        Args:
+            audio_files (list or dict): The stems' stream decoders. A dict
+                maps stem names to decoders; a list names them by index.
+                All stems must have the same frequency.
+            buffer_count (int, optional): Streaming buffers per stem.
+                                          Defaults to 3.
+            buffer_frames (int, optional): Sample frames per buffer.
+                                           Defaults to 8192.
+            decode_ahead (int, optional): As for SourceStream. Defaults to 0.
+            loop (bool, optional): Loop every stem. Defaults to False.
+            start_delay (float, optional): If positive and the device clock
+                extensions are present, `play()` schedules the start this
+                many seconds ahead with `play_sources_at_time`. Defaults to 0
+                (start with `play_sources`).
+            drift_tolerance (int, optional): Drift, in frames, above which
+                the drift callback is called. Defaults to 0.
+        """
+        if isinstance(audio_files, dict):
+            names, audio_files = list(audio_files.keys()), list(audio_files.values())
+        else:
+            audio_files = list(audio_files)
+            names = list(range(len(audio_files)))
+        if not audio_files:
+            raise OalError("A stem group needs at least one stem.")
+        frequencies = {audio_file.frequency for audio_file in audio_files}
+        if len(frequencies) > 1:
+            raise OalError("All stems must have the same frequency.")
+        self.frequency = frequencies.pop()
+        self.names = names
+        self.buffer_frames = buffer_frames
+        self.start_delay = start_delay
+        self.drift_tolerance = drift_tolerance
+
+        self._streams = []
+        try:
+            for name, audio_file in zip(names, audio_files):
+                frame_size = audio_file.channels * (getattr(audio_file, 'bit_depth', 16) // 8)
+                # Creating the stream fills all of its buffers.
+                stream = SourceStream(audio_file, buffer_count=buffer_count, buffer_size=buffer_frames * frame_size,
+                                      decode_ahead=decode_ahead, loop=loop)
+                stream.telemetry.name = str(name)
+                self._streams.append(stream)
+        except Exception:
+            for stream in self._streams:
+                stream.destroy()
+            raise
+
+        self._lock = threading.RLock()
+        self._destroy_callbacks = []
+        self._drift_callback = None
+        self._playing = False
+        self._is_active = True
+        self.drift = 0
+        self.max_drift = 0
+        self.resyncs = 0
+
+    def __len__(self):
+        return len(self._streams)
+
+    def __iter__(self):
+        return iter(self._streams)
+
+    def __getitem__(self, stem):
+        """Returns a stem's SourceStream, by name or index."""
+        return self._streams[self._index(stem)]
+
+    def _index(self, stem):
+        if stem in self.names:
+            return self.names.index(stem)
+        if isinstance(stem, int) and -len(self._streams) <= stem < len(self._streams):
+            return stem
+        raise KeyError(stem)
+
+    @property
+    def streams(self):
+        """A list of the stems' SourceStreams."""
+        return list(self._streams)
+
+    def set_gain(self, stem, gain):
+        """Sets the gain of one stem, by name or index."""
+        self[stem].gain = gain
+
+    def get_gain(self, stem) -> float:
+        """Returns the gain of one stem, by name or index."""
+        return self[stem].gain
+
+    def set_drift_callback(self, callback):
+        """
+        Registers a function to be called when the stems drift apart.
+
+        Args:
+            callback (callable): A function accepting `(group, drift)`, where
+                `drift` is the spread of the stems' positions in frames. It
+                runs in `update()` whenever the drift exceeds
+                `drift_tolerance`. Pass None to unregister.
+        """
+        if callback is not None and not callable(callback):
+            raise TypeError("The provided callback must be a callable function or None.")
+        self._drift_callback = callback
+
+    def _live(self):
+        return [stream for stream in self._streams if stream._is_active]
+
+    def _start(self, streams):
+        if self.start_delay > 0 and al.alIsExtensionPresent(b"AL_SOFT_source_start_delay"):
+            from .crossfade import _current_device
+            device = _current_device()
+            if device is not None and device.is_extension_present('ALC_SOFT_device_clock'):
+                clock = device.get_clock()['clock']
+                play_sources_at_time(streams, clock + seconds_to_nanoseconds(self.start_delay))
+                return
+        play_sources(streams)
+
+    def play(self):
+        """Starts or resumes all stems together."""
+        with self._lock:
+            live = self._live()
+            if live:
+                self._start(live)
+            self._playing = True
+
+    def pause(self):
+        """Pauses all stems together."""
+        with self._lock:
+            live = self._live()
+            if live:
+                pause_sources(live)
+            self._playing = False
+
+    def stop(self):
+        """Stops all stems. Use `seek(0)` to play them from the start again."""
+        with self._lock:
+            live = self._live()
+            if live:
+                stop_sources(live)
+            self._playing = False
+
+    @property
+    def position(self) -> float:
+        """The playback position of the first playing stem, in seconds."""
+        live = self._live()
+        return live[0].position if live else 0.0
+
+    def seek(self, seconds):
+        """
+        Moves all stems to the same position.
+
+        Returns:
+            float: The new position in seconds.
+        """
+        with self._lock:
+            playing = self._playing
+            position = 0.0
+            live = [stream for stream in self._streams if stream._id_value is not None]
+            stop_sources(live)
+            for stream in live:
+                position = stream.seek(seconds)
+            if playing:
+                self._start(live)
+            return position
+
+    def measure_drift(self) -> int:
+        """
+        Returns the spread of the playing stems' positions, in frames.
+
+        The offsets are read one stem at a time, so the read is repeated if
+        the mixer advanced in between.
+        """
+        live = self._live()
+        if len(live) < 2:
+            return 0
+        for _ in range(3):
+            positions = [stream.frame_position for stream in live]
+            if live[0].frame_position == positions[0]:
+                break
+        return max(positions) - min(positions)
+
+    @property
+    def queued_duration(self) -> float:
+        """The seconds of audio the emptiest stem has left to play."""
+        live = self._live()
+        return min((stream.queued_duration for stream in live), default=0.0)
+
+    def update(self):
+        """
+        Refills all stems in lockstep. Call this periodically, or register
+        the group with a StreamManager.
+
+        Returns:
+            True while any stem is still playing, False once all have finished.
+        """
+        with self._lock:
+            if not self._is_active:
+                return False
+            live = self._live()
+            states = [stream.state for stream in live]
+            for stream in live:
+                processed = stream._get_int_property(al.AL_BUFFERS_PROCESSED)
+                if processed > 0:
+                    stream._unqueue_processed(processed)
+
+            # Every stem gets the same number of new buffers.
+            filling = [stream for stream in live if not stream._is_finished]
+            count = min((len(stream._free_buffers) for stream in filling), default=0)
+            if count:
+                for stream in filling:
+                    stream._refill(blocking=True, limit=count)
+
+            stalled = []
+            for stream, state in zip(live, states):
+                if stream._is_finished and state != PlaybackState.PLAYING and not stream._queued_sizes:
+                    stream._is_active = False
+                elif (self._playing and state == PlaybackState.STOPPED and stream._queued_sizes
+                      and not stream._is_finished):
+                    stream.telemetry.record_underrun(stream)
+                    stalled.append(stream)
+
+            if stalled:
+                self._resync(stalled)
+            elif self._playing and all(state == PlaybackState.PLAYING for state in states):
+                self._report_drift()
+
+            if not self._live():
+                self._is_active = False
+            return self._is_active
+
+    def _resync(self, stalled):
+        """
+        Realigns all stems to the furthest one after an underrun and
+        restarts them together.
+        """
+        live = self._live()
+        self.resyncs += 1
+        if not all(hasattr(stream.audio_file, 'seek') for stream in live):
+            # Without seeking the stems cannot be realigned. Restart the
+            # stalled ones in place and let the drift report show it.
+            play_sources(stalled)
+            return
+        pause_sources(live)
+        target = max(stream.frame_position for stream in live)
+        stop_sources(live)
+        for stream in live:
+            stream.seek(target / self.frequency)
+        self._start(self._live())
+
+    def _report_drift(self):
+        drift = self.measure_drift()
+        self.drift = drift
+        if drift > self.max_drift:
+            self.max_drift = drift
+        callback = self._drift_callback
+        if callback is not None and drift > self.drift_tolerance:
+            callback(self, drift)
+
+    def destroy(self):
+        """Stops all stems and releases their resources."""
+        with self._lock:
+            if not self._streams:
+                return
+            live = [stream for stream in self._streams if stream._id_value is not None]
+            if live:
+                stop_sources(live)
+            for stream in self._streams:
+                stream.destroy()
+            self._streams = []
+            self._is_active = False
+            callbacks, self._destroy_callbacks = self._destroy_callbacks, []
+        for callback in callbacks:
+            callback(self)
@@ -1,26 +1,141 @@
 import ctypes
-import warnings
+import threading
+import time
+from collections import deque
 from . import al
 from .source import Source
-from .exceptions import OalWarning, OalError
-from .enums import AudioFormat
+from .exceptions import OalError
+from .enums import AudioFormat, PlaybackState
+from .helpers import _format_map
+from .memory import get_buffer_ledger
+from .decode_ahead import DecodeAheadStream
+from .adaptive import AdaptiveBuffering, AdaptationStats, _AdaptiveState, GROW, SHRINK
+from .telemetry import StreamTelemetry
 
 
+# Maps (channels, bits) to the matching format. 32-bit entries are float32.
+_CHANNELS_BITS_TO_FORMAT = {
+    (info.channels, info.bits): fmt
+    for fmt, info in _format_map.items()
+}
+
 def _channels_to_al_format(channels, bits) -> AudioFormat:
-    """Helper to determine the OpenAL format enum."""
-    if channels == 1:
-        return AudioFormat.MONO16 if bits == 16 else AudioFormat.MONO8
-    elif channels == 2:
-        return AudioFormat.STEREO16 if bits == 16 else AudioFormat.STEREO8
-    else:
-        raise OalError(f"Unsupported channel count for basic format conversion: {channels}")
+    """
+    Helper to determine the OpenAL format enum.
+
+    Supports mono, stereo, quad, 5.1, 6.1 and 7.1 layouts as 8-bit unsigned,
+    16-bit signed or 32-bit float samples. Layouts beyond stereo require
+    AL_EXT_MCFORMATS, and float samples AL_EXT_float32; both are checked
+    against the current context.
+    """
+    try:
+        audio_format = _CHANNELS_BITS_TO_FORMAT[(channels, bits)]
+    except KeyError:
+        raise OalError(f"Unsupported audio format: {channels} channel(s) at {bits} bits per sample.")
+    if channels > 2 or bits == 32:
+        from ._internal import _ensure_context
+        _ensure_context()
+        if channels > 2 and not al.alIsExtensionPresent(b"AL_EXT_MCFORMATS"):
+            raise OalError(f"{channels}-channel audio requires the AL_EXT_MCFORMATS extension, "
+                           "which is not supported by this OpenAL implementation.")
+        if bits == 32 and not al.alIsExtensionPresent(b"AL_EXT_float32"):
+            raise OalError("32-bit float audio requires the AL_EXT_float32 extension, "
+                           "which is not supported by this OpenAL implementation.")
+    return audio_format
+
+class _LoopingReader:
+    """
+    Wraps a seekable stream decoder so it rewinds to a loop start instead of
+    ending.
+
+    The chunk that reaches the loop end is completed with data from the loop
+    start, so the wrap is exact to the sample frame and falls inside a
+    buffer rather than between two of them.
+    """
+    def __init__(self, audio_file, loop_start=0, loop_end=None):
+        if getattr(audio_file, 'seek', None) is None:
+            raise OalError("Looping requires an audio stream that supports seeking.")
+        if loop_end is None:
+            # Looping at a known length avoids running into the end of the
+            # file, which closes some decoders.
+            loop_end = getattr(audio_file, 'num_frames', None)
+        if loop_start < 0 or (loop_end is not None and loop_start >= loop_end):
+            raise ValueError("Require 0 <= loop_start < loop_end.")
+        self.audio_file = audio_file
+        self.channels = audio_file.channels
+        self.frequency = audio_file.frequency
+        self.bit_depth = getattr(audio_file, 'bit_depth', 16)
+        self.loop_start = loop_start
+        self.loop_end = loop_end
+        self.enabled = True
+        self.loops = 0
+        self._frame_size = self.channels * (self.bit_depth // 8)
+        # The frame the next read starts at.
+        self._frame = 0
+        # Where the frames returned since the last seek came from in the
+        # file: (frames returned, file frame) at the seek and at each wrap,
+        # with frames returned counted from the seek target.
+        self._segments = deque([(0, 0)])
+        self._returned = 0
+
+    def get_buffer(self, size):
+        frame_size = self._frame_size
+        size = max(frame_size, size - size % frame_size)
+        chunks = []
+        collected = 0
+        while collected < size:
+            limit = size - collected
+            if self.enabled and self.loop_end is not None:
+                limit = min(limit, (self.loop_end - self._frame) * frame_size)
+            data = self.audio_file.get_buffer(limit) if limit > 0 else b''
+            if data:
+                chunks.append(data)
+                collected += len(data)
+                self._frame += len(data) // frame_size
+                continue
+            if not self.enabled or (self._frame <= self.loop_start and not collected):
+                # The end of the stream, or a loop region with no data in it.
+                break
+            if self.loop_end is None or self._frame < self.loop_end:
+                # The file ended before the loop end; that is where it wraps.
+                self.loop_end = self._frame
+            self._frame = self.audio_file.seek(self.loop_start)
+            self.loops += 1
+            self._segments.append((self._returned + collected // frame_size, self._frame))
+        self._returned += collected // frame_size
+        return b''.join(chunks)
+
+    def seek(self, frame):
+        self._frame = self.audio_file.seek(frame)
+        self._returned = self._frame
+        self._segments = deque([(self._frame, self._frame)])
+        return self._frame
+
+    def map_frame(self, frame):
+        """
+        Maps a playback position, counted as the last seek target plus the
+        frames played since, to a position in the file.
+        """
+        segments = self._segments
+        # Wraps that playback has passed are no longer needed.
+        while len(segments) > 1 and segments[1][0] <= frame:
+            segments.popleft()
+        start, file_frame = segments[0]
+        return file_frame + frame - start
+
+    def close(self):
+        close = getattr(self.audio_file, 'close', None)
+        if close is not None:
+            close()
+
 
 class SourceStream(Source):
     """
     A Source subclass for streaming audio from a file-like object.
     It automatically manages a set of internal buffers.
     """
-    def __init__(self, audio_file, buffer_count=3, buffer_size=4096 * 8):
+    def __init__(self, audio_file, buffer_count=3, buffer_size=4096 * 8, decode_ahead=0, adaptive=None,
+                 loop=False, loop_start=0, loop_end=None):
         """
         Creates a streaming source.
 
@@ -33,89 +148,437 @@ class SourceStream(Source):
                                           use for streaming. Defaults to 3.
             buffer_size (int, optional): The size of each internal buffer in
                                          bytes. Defaults to 32768.
+            decode_ahead (int, optional): If non-zero, `audio_file` is decoded
+                on a background worker, keeping up to this many chunks ready,
+                so refills never wait for the decoder. Defaults to 0 (decode
+                synchronously in `update()`).
+            adaptive (AdaptiveBuffering or bool, optional): If given, the
+                buffer count and size are adjusted at runtime within the
+                policy's bounds, based on measured headroom and underruns.
+                True uses a default AdaptiveBuffering. Defaults to None
+                (fixed buffering).
+            loop (bool, optional): If True, the stream rewinds its decoder
+                at the end instead of finishing. Requires a decoder that can
+                seek. Defaults to False.
+            loop_start (int, optional): The sample frame playback returns to
+                when looping. Frames before it play once, as an intro.
+                Defaults to 0.
+            loop_end (int, optional): The sample frame at which playback
+                returns to `loop_start`. Defaults to the end of the stream.
+
+        Underruns, refills, decode and upload times and queue levels are
+        recorded in the `telemetry` attribute (a StreamTelemetry).
         """
         super().__init__()
-        self.audio_file = audio_file
-        self.buffer_count = buffer_count
-        self.buffer_size = buffer_size
-                
+        self.telemetry = StreamTelemetry()
+        # Set by stop() so update() does not take the stop for an underrun.
+        self._user_stopped = False
         # Determine audio format
         # Assuming 16-bit audio if not specified, which is common.
         bits = getattr(audio_file, 'bit_depth', 16) 
         self.al_format = _channels_to_al_format(audio_file.channels, bits)
+        self._frame_size = audio_file.channels * (bits // 8)
+
+        if adaptive is True:
+            adaptive = AdaptiveBuffering()
+        self.adaptive = adaptive or None
+        self._adaptive_state = _AdaptiveState(adaptive) if adaptive else None
+        if adaptive:
+            buffer_count = min(max(buffer_count, adaptive.min_buffers), adaptive.max_buffers)
+            buffer_size = min(max(buffer_size, adaptive.min_buffer_size), adaptive.max_buffer_size)
+        buffer_size = self._align_size(buffer_size)
+        # Buffers to delete instead of refilling, after the policy shrank the count.
+        self._retire_count = 0
+
+        # Looping happens below decode-ahead, so chunks across the loop point
+        # are decoded ahead like any others.
+        self._loop_reader = _LoopingReader(audio_file, loop_start, loop_end) if loop else None
+        if loop:
+            audio_file = self._loop_reader
+        if decode_ahead:
+            audio_file = DecodeAheadStream(audio_file, buffer_size, depth=decode_ahead,
+                                           decode_time=self.telemetry.decode_time)
+        self.audio_file = audio_file
+        self.buffer_count = buffer_count
+        self.buffer_size = buffer_size
         
         # Create and manage our own buffers
-        self._buffers = (ctypes.c_uint * STREAM_BUFFER_COUNT)()
-        al.alGenBuffers(STREAM_BUFFER_COUNT, self._buffers)
+        self._buffers = (ctypes.c_uint * buffer_count)()
+        al.alGenBuffers(buffer_count, self._buffers)
+
+        # Byte sizes of the buffers currently in the source's queue, oldest
+        # first, used to work out how much audio is left to play.
+        self._queued_sizes = deque()
+
+        # Unqueued buffers waiting for data. A buffer stays here when a
+        # decode-ahead reader has no chunk ready yet.
+        self._free_buffers = deque(self._buffers)
+
+        # ID arrays passed to alSourceQueueBuffers and alSourceUnqueueBuffers,
+        # allocated once so refills create no ctypes objects. Refilled
+        # buffers are staged in _queue_ids and queued in a single call.
+        self._queue_ids = (ctypes.c_uint * buffer_count)()
+        self._unqueue_ids = (ctypes.c_uint * buffer_count)()
+        self._staged_count = 0
+
+        # Serializes update() and destroy(), which may run on a StreamManager
+        # thread and on the application's thread.
+        self._lock = threading.RLock()
         
+        # Streaming buffers are recorded in the ledger for accounting, but
+        # refills are never refused by the budget.
+        self._ledger = get_buffer_ledger()
+
         self._is_active = True
         self._is_finished = False
 
-        for buf_id in self._buffers:
-            self._fill_and_queue_buffer(buf_id)
-        
-    def _fill_and_queue_buffer(self, buf_id):
-        """Fills a single buffer with data from the stream and queues it."""
+        # Decoder frame at the start of the first queued buffer: the seek
+        # target plus every frame unqueued since.
+        self._base_frame = 0
+
+        # The initial fill waits for the decoder so playback starts with a
+        # full queue.
+        self._refill(blocking=True)
+
+    def _align_size(self, size):
+        """Rounds a byte size down to whole sample frames."""
+        return max(self._frame_size, size - size % self._frame_size)
+
+    def _read_chunk(self, blocking=False):
+        """Returns the next chunk of audio, b'' at the end, or None if not ready yet."""
+        try_get_buffer = getattr(self.audio_file, 'try_get_buffer', None)
+        if try_get_buffer is not None and not blocking:
+            data = try_get_buffer(self.buffer_size)
+            if data is None:
+                self.telemetry.record_stall()
+            return data
+        if isinstance(self.audio_file, DecodeAheadStream):
+            # The worker records its own decode times.
+            return self.audio_file.get_buffer(self.buffer_size) or b''
+        start = time.perf_counter()
+        data = self.audio_file.get_buffer(self.buffer_size) or b''
+        self.telemetry.decode_time.record(time.perf_counter() - start)
+        return data
+
+    def _refill(self, blocking=False, limit=None):
+        """
+        Fills free buffers until the data runs out or is not ready, then
+        queues them all with one call. At most `limit` buffers are filled
+        if it is given.
+        """
+        if limit is None:
+            limit = len(self._free_buffers)
+        try:
+            while limit > 0 and self._free_buffers and not self._is_finished:
+                if not self._fill_buffer(self._free_buffers[0], blocking):
+                    break
+                self._free_buffers.popleft()
+                limit -= 1
+        finally:
+            if self._staged_count:
+                al.alSourceQueueBuffers(self._id, self._staged_count, self._queue_ids)
+                self._staged_count = 0
+
+    def _fill_buffer(self, buf_id, blocking=False):
+        """Fills a single buffer with data from the stream and stages it for queuing."""
         if self._is_finished:
             return False
 
-        data = self.audio_file.get_buffer(self.buffer_size)            
+        data = self._read_chunk(blocking)
+        if data is None:
+            # The decoder is running behind. Keep the buffer for the next update.
+            return False
         if data:
+            start = time.perf_counter()
             al.alBufferData(buf_id, self.al_format, data, len(data), self.audio_file.frequency)
-            al.alSourceQueueBuffers(self._id, 1, ctypes.byref(ctypes.c_uint(buf_id)))
+            self._ledger.record(buf_id, len(data), 'stream')
+            self.telemetry.record_refill(len(data), time.perf_counter() - start)
+            self._queue_ids[self._staged_count] = buf_id
+            self._staged_count += 1
+            self._queued_sizes.append(len(data))
             return True
         else:
             # Reached end of stream
             self._is_finished = True
             return False
 
+    @property
+    def decode_stats(self):
+        """
+        The DecodeStats of the decode-ahead reader, or None if the stream
+        decodes synchronously.
+        """
+        get_stats = getattr(self.audio_file, 'get_stats', None)
+        return get_stats() if get_stats is not None else None
+
+    @property
+    def queued_duration(self) -> float:
+        """
+        The seconds of audio queued on the source that have not been played yet.
+
+        This is how long the stream can keep playing without a refill.
+        """
+        with self._lock:
+            if self._id_value is None or not self._queued_sizes:
+                return 0.0
+            queued_frames = sum(self._queued_sizes) // self._frame_size
+            # AL_SAMPLE_OFFSET counts from the start of the first queued buffer.
+            remaining = queued_frames - self.sample_offset
+            return max(remaining, 0) / self.audio_file.frequency
+
+    @property
+    def frame_position(self) -> int:
+        """
+        The playback position in the stream, in sample frames.
+
+        Unlike `sample_offset`, which only counts within the queued buffers,
+        this counts from the start of the file and follows `seek()`. For a
+        looping stream it wraps back to the loop start at the loop end.
+        """
+        with self._lock:
+            frame = self._base_frame
+            if self._id_value is not None and self._queued_sizes:
+                frame += self.sample_offset
+            if self._loop_reader is not None:
+                frame = self._loop_reader.map_frame(frame)
+            return frame
+
+    @property
+    def loop(self) -> bool:
+        """
+        Whether a stream created with `loop=True` keeps looping. Setting it
+        to False lets the stream play on to its end and finish.
+        """
+        return self._loop_reader is not None and self._loop_reader.enabled
+
+    @loop.setter
+    def loop(self, value):
+        if self._loop_reader is None:
+            raise OalError("Only streams created with loop=True can loop.")
+        self._loop_reader.enabled = bool(value)
+
+    @property
+    def position(self) -> float:
+        """The playback position in the stream, in seconds. See `frame_position`."""
+        return self.frame_position / self.audio_file.frequency
+
+    def seek(self, seconds):
+        """
+        Moves playback to a position in the stream.
+
+        The queued buffers are discarded, the decoder is repositioned, and
+        the queue is refilled. A playing or paused stream stays playing or
+        paused. The WAV and miniaudio decoders seek in place; a PyOgg decoder
+        that has reached the end of the file reopens it.
+
+        Args:
+            seconds (float): The position to seek to, from the start of the
+                             stream.
+
+        Returns:
+            float: The new position in seconds, which is exact to the sample
+                   frame (and clamped to the length of the stream).
+
+        Raises:
+            OalError: If the stream's decoder cannot seek.
+        """
+        with self._lock:
+            if self._id_value is None:
+                raise OalError("Cannot seek a destroyed stream.")
+            seek = getattr(self.audio_file, 'seek', None)
+            if seek is None:
+                raise OalError("This audio stream does not support seeking.")
+
+            state = self.state
+            self.stop()
+            if self._queued_sizes:
+                al.alSourceUnqueueBuffers(self._id, len(self._queued_sizes), self._unqueue_ids)
+            self._queued_sizes.clear()
+            self._free_buffers = deque(self._buffers)
+            while self._retire_count and self._free_buffers:
+                self._retire_buffer(self._free_buffers.pop())
+
+            self._base_frame = seek(max(0, round(seconds * self.audio_file.frequency)))
+            self._user_stopped = False
+            self._is_finished = False
+            self._is_active = True
+            # Back to AL_INITIAL, so update() does not take the stop for an underrun.
+            self.rewind()
+            self._refill(blocking=True)
+
+            if state in (PlaybackState.PLAYING, PlaybackState.PAUSED):
+                self.play()
+                if state == PlaybackState.PAUSED:
+                    self.pause()
+            return self._base_frame / self.audio_file.frequency
+
+    def play(self):
+        """Starts or resumes playback."""
+        self._user_stopped = False
+        super().play()
+
+    def play_at_time(self, device_clock_time: int):
+        """See `Source.play_at_time`."""
+        self._user_stopped = False
+        super().play_at_time(device_clock_time)
+
+    def stop(self):
+        """
+        Stops playback. Unlike a stop caused by an underrun, `update()` does
+        not restart it; call `play()` or `seek()` to continue.
+        """
+        self._user_stopped = True
+        super().stop()
+
     def update(self):
         """
         Maintains the stream by refilling and queuing processed buffers.
-        This should be called periodically (e.g., once per game loop).
+        This should be called periodically (e.g., once per game loop), or
+        the stream can be registered with a StreamManager instead.
         
         Returns:
             True if the stream is still active, False if it has finished.
         """
+        with self._lock:
+            if self._id_value is None:
+                return False
+            return self._update()
+
+    def _update(self):
         if not self._is_active:
             return False
 
+        # The state is read once. Queuing buffers does not change it, and the
+        # queue length is tracked in _queued_sizes, so a steady-state update
+        # takes a fixed number of calls into OpenAL plus one alBufferData
+        # per refilled buffer.
+        state = self.state
+        headroom = None
+        if state == PlaybackState.PLAYING:
+            headroom = self.queued_duration
+            self.telemetry.queued_duration.record(headroom)
+        underrun = False
+
         processed_count = self._get_int_property(al.AL_BUFFERS_PROCESSED)
 
         if processed_count > 0:
-            processed_buffers = (ctypes.c_uint * processed_count)()
-            al.alSourceUnqueueBuffers(self._id, processed_count, processed_buffers)
-            
-            for buf_id in processed_buffers:
-                if not self._fill_and_queue_buffer(buf_id):
-                    # No more data to queue, break early
-                    break
+            self._unqueue_processed(processed_count)
+
+        while self._retire_count and self._free_buffers:
+            self._retire_buffer(self._free_buffers.pop())
+
+        self._refill()
         
         # If we've run out of buffers to queue and the source has stopped,
         # it means the stream is finished.
-        if self._is_finished and self.state != al.AL_PLAYING:
-             queued_count = self._get_int_property(al.AL_BUFFERS_QUEUED)
-             if queued_count == 0:
-                self._is_active = False
+        if self._is_finished and state != PlaybackState.PLAYING and not self._queued_sizes:
+            self._is_active = False
 
         # If the source has stopped playing due to buffer underrun, restart it.
-        if self._is_active and not self._is_finished and self.state != al.AL_PLAYING:
-            queued_count = self._get_int_property(al.AL_BUFFERS_QUEUED)
-            if queued_count > 0:
-                warnings.warn(OalWarning("Stream buffer underrun. Consider increasing buffer count or size."))
-                self.play()
+        # Paused, not-yet-started and explicitly stopped sources are left
+        # alone. The state is read again here because a refill may have
+        # rewound the source.
+        if (self._is_active and not self._is_finished and not self._user_stopped
+                and state == PlaybackState.STOPPED and self._queued_sizes
+                and self.state == PlaybackState.STOPPED):
+            underrun = True
+            self.telemetry.record_underrun(self)
+            self.play()
+
+        if self._adaptive_state is not None and self._is_active and not self._is_finished:
+            action = self._adaptive_state.observe(headroom, underrun)
+            if action == GROW:
+                self._grow()
+            elif action == SHRINK:
+                self._shrink()
 
         return self._is_active
 
+    def _unqueue_processed(self, count):
+        """Unqueues `count` played buffers and returns them to the free list."""
+        al.alSourceUnqueueBuffers(self._id, count, self._unqueue_ids)
+        # Index the ctypes array directly; slicing it would build a list.
+        unqueue_ids = self._unqueue_ids
+        for i in range(count):
+            self._base_frame += self._queued_sizes.popleft() // self._frame_size
+            self._free_buffers.append(unqueue_ids[i])
+
+    @property
+    def adaptation_stats(self):
+        """
+        The AdaptationStats of an adaptive stream (current buffer count and
+        size, grow/shrink/underrun counts), or None for fixed buffering.
+        """
+        state = self._adaptive_state
+        if state is None:
+            return None
+        min_headroom = state.min_headroom if state.min_headroom != float('inf') else None
+        return AdaptationStats(self.buffer_count - self._retire_count, self.buffer_size,
+                               state.grows, state.shrinks, state.underruns, min_headroom)
+
+    def _set_buffer_size(self, size):
+        self.buffer_size = self._align_size(size)
+        if hasattr(self.audio_file, 'chunk_size'):
+            self.audio_file.chunk_size = self.buffer_size
+
+    def _grow(self):
+        """Adds a buffer, or doubles the buffer size once the count is at its maximum."""
+        policy = self.adaptive
+        if self._retire_count:
+            self._retire_count -= 1
+        elif self.buffer_count < policy.max_buffers:
+            new_id = ctypes.c_uint()
+            al.alGenBuffers(1, ctypes.byref(new_id))
+            self._buffers = (ctypes.c_uint * (self.buffer_count + 1))(*self._buffers, new_id.value)
+            self.buffer_count += 1
+            if self.buffer_count > len(self._queue_ids):
+                self._queue_ids = (ctypes.c_uint * self.buffer_count)()
+                self._unqueue_ids = (ctypes.c_uint * self.buffer_count)()
+            self._free_buffers.append(new_id.value)
+            self._refill()
+        elif self.buffer_size < self._align_size(policy.max_buffer_size):
+            self._set_buffer_size(min(self.buffer_size * 2, policy.max_buffer_size))
+        else:
+            return
+        self._adaptive_state.grows += 1
+
+    def _shrink(self):
+        """Halves the buffer size, or removes a buffer once the size is at its minimum."""
+        policy = self.adaptive
+        if self.buffer_size > policy.min_buffer_size:
+            self._set_buffer_size(max(self.buffer_size // 2, policy.min_buffer_size))
+        elif self.buffer_count - self._retire_count > policy.min_buffers:
+            # The buffer is deleted as soon as one is unqueued.
+            self._retire_count += 1
+        else:
+            return
+        self._adaptive_state.shrinks += 1
+
+    def _retire_buffer(self, buf_id):
+        """Deletes an unqueued buffer that the adaptive policy no longer needs."""
+        al.alDeleteBuffers(1, ctypes.byref(ctypes.c_uint(buf_id)))
+        self._ledger.release(buf_id)
+        self._buffers = (ctypes.c_uint * (self.buffer_count - 1))(*(b for b in self._buffers if b != buf_id))
+        self.buffer_count -= 1
+        self._retire_count -= 1
+
     def destroy(self):
         """Stops the stream and releases all OpenAL resources."""
-        if self._id_value is not None:
-            self.stop()
-            queued_count = self._get_int_property(al.AL_BUFFERS_QUEUED)
-            if queued_count > 0:
-                processed_buffers = (ctypes.c_uint * queued_count)()
-                al.alSourceUnqueueBuffers(self._id, queued_count, processed_buffers)
+        with self._lock:
+            if self._id_value is not None:
+                self.stop()
+                if self._queued_sizes:
+                    al.alSourceUnqueueBuffers(self._id, len(self._queued_sizes), self._unqueue_ids)
+                self._queued_sizes.clear()
+                self._free_buffers.clear()
 
-            al.alDeleteBuffers(self.buffer_count, self._buffers)
-        
-        super().destroy()
+                al.alDeleteBuffers(self.buffer_count, self._buffers)
+                for buf_id in self._buffers:
+                    self._ledger.release(buf_id)
+
+                close = getattr(self.audio_file, 'close', None)
+                if close is not None:
+                    close()
+                self.telemetry.retire()
+            
+            super().destroy()
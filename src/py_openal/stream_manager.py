@@ -0,0 +1,172 @@
+import threading
+import traceback
+
+class StreamManager:
+    """
+    Refills registered SourceStreams from a dedicated background thread.
+
+    The application no longer has to call `update()` every frame, and a
+    stalled main loop (garbage collection, level loading) no longer starves
+    the streams.
+
+    On every pass the streams are serviced earliest-deadline-first: the
+    stream with the least queued audio left is refilled first. Streams that
+    finish are removed automatically.
+    """
+    def __init__(self, period=0.01):
+        """
+        Args:
+            period (float, optional): Seconds between refill passes. It should
+                be well below the duration of one stream buffer. Defaults to
+                0.01 (10 ms).
+        """
+        if period <= 0:
+            raise ValueError("period must be positive.")
+        self.period = period
+        self._streams = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __contains__(self, stream):
+        with self._lock:
+            return stream in self._streams
+
+    def __len__(self):
+        with self._lock:
+            return len(self._streams)
+
+    @property
+    def streams(self):
+        """A list of the registered streams."""
+        with self._lock:
+            return list(self._streams)
+
+    @property
+    def running(self) -> bool:
+        """True while the background thread is running."""
+        return self._running
+
+    def add(self, stream):
+        """
+        Registers a stream to be refilled by this manager.
+
+        The stream is unregistered automatically when it finishes or is
+        destroyed. Do not call `update()` on it yourself while it is
+        registered.
+
+        Args:
+            stream (SourceStream): The stream to service.
+        """
+        with self._lock:
+            if stream in self._streams:
+                return
+            self._streams.append(stream)
+        stream._destroy_callbacks.append(self._on_stream_destroyed)
+
+    def remove(self, stream):
+        """
+        Unregisters a stream. It can then be updated manually again.
+
+        Returns:
+            bool: True if the stream was registered.
+        """
+        with self._lock:
+            if stream not in self._streams:
+                return False
+            self._streams.remove(stream)
+        if self._on_stream_destroyed in stream._destroy_callbacks:
+            stream._destroy_callbacks.remove(self._on_stream_destroyed)
+        return True
+
+    def _on_stream_destroyed(self, stream):
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+    def service(self):
+        """
+        Runs one refill pass over all registered streams.
+
+        This is what the background thread calls every period. It can also
+        be called directly when the manager is not started.
+        """
+        with self._lock:
+            streams = list(self._streams)
+        if not streams:
+            return
+
+        # Earliest deadline first: the stream closest to running dry goes first.
+        deadlines = []
+        for stream in streams:
+            try:
+                deadlines.append((stream.queued_duration, stream))
+            except Exception:
+                deadlines.append((0.0, stream))
+        deadlines.sort(key=lambda item: item[0])
+
+        for _, stream in deadlines:
+            try:
+                active = stream.update()
+            except Exception:
+                traceback.print_exc()
+                active = False
+            if not active:
+                self.remove(stream)
+
+    def start(self):
+        """Starts the background thread. Does nothing if it is already running."""
+        if self._running:
+            return
+        self._running = True
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="py_openal-StreamManager", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stops the background thread. Registered streams stay registered.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread to exit.
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while self._running:
+            self.service()
+            self._wake.wait(self.period)
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+def get_stream_manager():
+    """
+    Returns the shared StreamManager, creating and starting it on first use.
+
+    This is the manager used by `stream(..., manager=True)`.
+
+    Returns:
+        StreamManager: The running default manager.
+    """
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = StreamManager()
+        _default_manager.start()
+        return _default_manager
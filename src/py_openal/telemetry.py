@@ -0,0 +1,484 @@
+import bisect
+import threading
+import weakref
+from collections import namedtuple
+
+# Bucket upper bounds in seconds: powers of two from about 1 microsecond to
+# about 2 minutes, which covers decode and upload times as well as queue
+# durations.
+DEFAULT_BOUNDS = tuple(2.0 ** e for e in range(-20, 8))
+
+# Summary of a Histogram. Percentiles are bucket upper bounds, so they are
+# accurate to within a factor of two.
+HistogramStats = namedtuple('HistogramStats', ['count', 'mean', 'min', 'max', 'p50', 'p95', 'p99'])
+
+# A snapshot of one stream's telemetry, or of an aggregate of streams.
+StreamStats = namedtuple('StreamStats', ['name', 'streams', 'underruns', 'refills', 'stalls', 'bytes_streamed',
+                                         'decode_time', 'upload_time', 'queued_duration', 'errors'])
+
+# A snapshot of one native callback's CallbackTelemetry. `rate` is in calls
+# per second; `exec_time` and `gil_wait` are HistogramStats, or None when
+# histograms are off.
+CallbackStats = namedtuple('CallbackStats', ['name', 'calls', 'rate', 'short_returns', 'zero_returns',
+                                             'exceptions', 'total_time', 'max_time', 'max_gil_wait',
+                                             'exec_time', 'gil_wait'])
+
+class Histogram:
+    """
+    A thread-safe histogram with fixed, log-spaced buckets.
+
+    Recording is O(log buckets) and allocation-free, so it is cheap enough
+    for every refill.
+    """
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        """
+        Args:
+            bounds (iterable[float], optional): Increasing bucket upper bounds.
+                Values above the last bound go to an overflow bucket.
+        """
+        self.bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears all recorded values."""
+        with self._lock:
+            self._counts = [0] * (len(self.bounds) + 1)
+            self._count = 0
+            self._total = 0.0
+            self._min = None
+            self._max = None
+
+    def record(self, value):
+        """Adds one value."""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total += value
+            if self._min is None or value < self._min:
+                self._min = value
+            if self._max is None or value > self._max:
+                self._max = value
+
+    def record_unlocked(self, value):
+        """
+        Adds one value without taking the lock.
+
+        For a histogram with a single writer that must never block, such as
+        an OpenAL callback on the mixer thread. A reader on another thread
+        may see the value in some fields and not yet in others.
+        """
+        index = bisect.bisect_left(self.bounds, value)
+        self._counts[index] += 1
+        self._count += 1
+        self._total += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if self._max is None or value > self._max:
+            self._max = value
+
+    @property
+    def count(self) -> int:
+        """The number of recorded values."""
+        return self._count
+
+    @property
+    def total(self) -> float:
+        """The sum of the recorded values."""
+        return self._total
+
+    @property
+    def mean(self):
+        """The mean of the recorded values, or None if there are none."""
+        with self._lock:
+            return self._total / self._count if self._count else None
+
+    @property
+    def min(self):
+        """The smallest recorded value, or None."""
+        return self._min
+
+    @property
+    def max(self):
+        """The largest recorded value, or None."""
+        return self._max
+
+    def buckets(self):
+        """
+        Returns the bucket counts.
+
+        Returns:
+            list[tuple]: `(upper_bound, count)` pairs. The last pair has an
+                         upper bound of infinity.
+        """
+        with self._lock:
+            return list(zip(self.bounds + (float('inf'),), self._counts))
+
+    def percentile(self, p):
+        """
+        Returns the upper bound of the bucket containing the p-th percentile.
+
+        Args:
+            p (float): The percentile, from 0 to 100.
+
+        Returns:
+            float or None: The estimate (never above the maximum), or None if
+                           the histogram is empty.
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            rank = p / 100.0 * self._count
+            seen = 0
+            for bound, count in zip(self.bounds, self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return min(bound, self._max)
+            return self._max
+
+    def merge(self, other):
+        """Adds the values recorded in another histogram with the same bounds."""
+        if other.bounds != self.bounds:
+            raise ValueError("Cannot merge histograms with different bounds.")
+        with other._lock:
+            counts, count, total = list(other._counts), other._count, other._total
+            other_min, other_max = other._min, other._max
+        with self._lock:
+            self._counts = [a + b for a, b in zip(self._counts, counts)]
+            self._count += count
+            self._total += total
+            if other_min is not None and (self._min is None or other_min < self._min):
+                self._min = other_min
+            if other_max is not None and (self._max is None or other_max > self._max):
+                self._max = other_max
+
+    def get_stats(self) -> HistogramStats:
+        """Returns a summary of the histogram."""
+        return HistogramStats(self._count, self.mean, self._min, self._max,
+                              self.percentile(50), self.percentile(95), self.percentile(99))
+
+
+# Telemetry of every live stream, and the totals of destroyed ones so the
+# aggregate counters never go backwards.
+_live_streams = weakref.WeakSet()
+_registry_lock = threading.Lock()
+_underrun_callback = None
+
+class StreamTelemetry:
+    """
+    Counters and histograms for one SourceStream.
+
+    Every SourceStream has one as its `telemetry` attribute. Use
+    `get_stream_stats()` for the aggregate over all streams.
+    """
+    def __init__(self, name=None, register=True):
+        """
+        Args:
+            name (str, optional): A label for reports, e.g. the file path.
+            register (bool, optional): Whether to include this object in the
+                                       aggregate view. Defaults to True.
+        """
+        self.name = name
+        self.decode_time = Histogram()
+        self.upload_time = Histogram()
+        self.queued_duration = Histogram()
+        self._lock = threading.Lock()
+        self._streams = 1
+        self.reset_counters()
+        if register:
+            with _registry_lock:
+                _live_streams.add(self)
+
+    def reset_counters(self):
+        """Resets the counters. Histograms are reset separately."""
+        with self._lock:
+            self.underruns = 0
+            self.refills = 0
+            self.stalls = 0
+            self.bytes_streamed = 0
+            self.errors = 0
+            self.last_error = None
+
+    def reset(self):
+        """Resets all counters and histograms."""
+        self.reset_counters()
+        for histogram in (self.decode_time, self.upload_time, self.queued_duration):
+            histogram.reset()
+
+    def record_underrun(self, stream=None):
+        """Counts an underrun and reports it to the underrun callback."""
+        with self._lock:
+            self.underruns += 1
+        callback = _underrun_callback
+        if callback is not None:
+            callback(stream, self)
+
+    def record_refill(self, size, upload_time=None):
+        """
+        Counts one buffer refilled with `size` bytes in `upload_time` seconds.
+        Streams that do not upload buffers pass no time.
+        """
+        with self._lock:
+            self.refills += 1
+            self.bytes_streamed += size
+        if upload_time is not None:
+            self.upload_time.record(upload_time)
+
+    def record_stall(self):
+        """Counts a refill that found no decoded data ready."""
+        with self._lock:
+            self.stalls += 1
+
+    def record_error(self, exception):
+        """Counts a decoder failure that ended the stream."""
+        with self._lock:
+            self.errors += 1
+            self.last_error = exception
+
+    def merge(self, other):
+        """Adds another StreamTelemetry's counters and histograms to this one."""
+        with other._lock:
+            values = (other._streams, other.underruns, other.refills, other.stalls, other.bytes_streamed,
+                      other.errors)
+        with self._lock:
+            self._streams += values[0]
+            self.underruns += values[1]
+            self.refills += values[2]
+            self.stalls += values[3]
+            self.bytes_streamed += values[4]
+            self.errors += values[5]
+        self.decode_time.merge(other.decode_time)
+        self.upload_time.merge(other.upload_time)
+        self.queued_duration.merge(other.queued_duration)
+
+    def retire(self):
+        """
+        Removes this stream from the live set, folding its totals into the
+        aggregate. Called when the stream is destroyed.
+        """
+        with _registry_lock:
+            if self in _live_streams:
+                _live_streams.discard(self)
+                _retired.merge(self)
+
+    def get_stats(self) -> StreamStats:
+        """Returns a snapshot of this object's counters and histograms."""
+        with self._lock:
+            counters = (self._streams, self.underruns, self.refills, self.stalls, self.bytes_streamed)
+            errors = self.errors
+        return StreamStats(self.name, *counters, self.decode_time.get_stats(),
+                           self.upload_time.get_stats(), self.queued_duration.get_stats(), errors)
+
+_retired = StreamTelemetry('retired', register=False)
+_retired._streams = 0
+
+def set_underrun_callback(callback):
+    """
+    Registers a function to be called whenever any stream underruns.
+
+    Args:
+        callback (callable): A function accepting `(stream, telemetry)`. It
+                             runs on the thread that called `update()`. Pass
+                             None to unregister.
+    """
+    global _underrun_callback
+    if callback is not None and not callable(callback):
+        raise TypeError("The provided callback must be a callable function or None.")
+    _underrun_callback = callback
+
+def get_stream_stats(include_destroyed=True) -> StreamStats:
+    """
+    Returns the telemetry aggregated over all streams.
+
+    Args:
+        include_destroyed (bool, optional): Include the totals of streams
+            that have been destroyed. Defaults to True.
+
+    Returns:
+        StreamStats: The aggregate. `streams` is the number of streams
+                     included.
+    """
+    total = StreamTelemetry('all', register=False)
+    total._streams = 0
+    with _registry_lock:
+        live = list(_live_streams)
+        if include_destroyed:
+            total.merge(_retired)
+    for telemetry in live:
+        total.merge(telemetry)
+    return total.get_stats()
+
+def get_all_stream_stats():
+    """Returns a list with the StreamStats of every live stream."""
+    with _registry_lock:
+        live = list(_live_streams)
+    return [telemetry.get_stats() for telemetry in live]
+
+def reset_stream_stats():
+    """Resets the telemetry of all live streams and forgets destroyed ones."""
+    with _registry_lock:
+        live = list(_live_streams)
+        _retired.reset()
+        _retired._streams = 0
+    for telemetry in live:
+        telemetry.reset()
+
+
+# Telemetry of every live native callback, and whether new ones record
+# histograms.
+_live_callbacks = weakref.WeakSet()
+_callback_histograms = False
+
+class CallbackTelemetry:
+    """
+    Counters, and optionally histograms, for a callback that OpenAL calls
+    from one of its own threads.
+
+    It records how often the callback runs, how long each call takes, calls
+    that returned less than requested or nothing, and exceptions. The GIL
+    wait is an estimate: ctypes takes the GIL before any Python code runs,
+    so it cannot be timed directly. For periodic callbacks it is taken as
+    how much later than one period after the previous call the callback
+    started.
+
+    The counters are updated from the callback thread without a lock, so a
+    snapshot taken from another thread can be off by a call.
+    """
+    def __init__(self, name=None, histograms=None, register=True):
+        """
+        Args:
+            name (str, optional): A label for reports.
+            histograms (bool, optional): Record execution time and GIL wait
+                histograms. Defaults to the setting of
+                `set_callback_histograms()`, which is off.
+            register (bool, optional): Whether to include this object in
+                `get_callback_stats()`. Defaults to True.
+        """
+        self.name = name
+        self.exec_time = None
+        self.gil_wait = None
+        self.enable_histograms(_callback_histograms if histograms is None else histograms)
+        self.reset()
+        if register:
+            with _registry_lock:
+                _live_callbacks.add(self)
+
+    def enable_histograms(self, enabled=True):
+        """Turns the execution time and GIL wait histograms on or off."""
+        if enabled:
+            self.exec_time = self.exec_time or Histogram()
+            self.gil_wait = self.gil_wait or Histogram()
+        else:
+            self.exec_time = None
+            self.gil_wait = None
+
+    def reset(self):
+        """Clears the counters and histograms."""
+        self.calls = 0
+        self.short_returns = 0
+        self.zero_returns = 0
+        self.exceptions = 0
+        self.last_exception = None
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.max_gil_wait = 0.0
+        self._first_call = None
+        self._last_call = None
+        self._next_expected = None
+        for histogram in (self.exec_time, self.gil_wait):
+            if histogram is not None:
+                histogram.reset()
+
+    def record_call(self, start, end, returned=None, requested=None, period=None):
+        """
+        Records one call.
+
+        Args:
+            start (float): `time.perf_counter()` when the callback began.
+            end (float): `time.perf_counter()` when it returned.
+            returned (int, optional): The amount the callback delivered.
+            requested (int, optional): The amount OpenAL asked for.
+            period (float, optional): The seconds of audio the call
+                produced, which is when the next call is expected. Used for
+                the GIL wait estimate.
+        """
+        elapsed = end - start
+        self.calls += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        if self._first_call is None:
+            self._first_call = start
+        self._last_call = start
+        # The histograms have one writer, the callback thread, which must
+        # not wait for a reader holding their lock.
+        if self.exec_time is not None:
+            self.exec_time.record_unlocked(elapsed)
+        if requested is not None:
+            if not returned:
+                self.zero_returns += 1
+            elif returned < requested:
+                self.short_returns += 1
+        if period is not None:
+            expected = self._next_expected
+            if expected is not None and start > expected:
+                wait = start - expected
+                if wait > self.max_gil_wait:
+                    self.max_gil_wait = wait
+                if self.gil_wait is not None:
+                    self.gil_wait.record_unlocked(wait)
+            self._next_expected = (start if expected is None else max(start, expected)) + period
+
+    def unregister(self):
+        """Removes this object from `get_callback_stats()`."""
+        with _registry_lock:
+            _live_callbacks.discard(self)
+
+    def record_exception(self, exception):
+        """Counts an exception raised by the callback."""
+        self.exceptions += 1
+        self.last_exception = exception
+
+    @property
+    def rate(self):
+        """Calls per second between the first and the latest call, or None."""
+        if self.calls < 2 or self._last_call == self._first_call:
+            return None
+        return (self.calls - 1) / (self._last_call - self._first_call)
+
+    def get_stats(self) -> CallbackStats:
+        """Returns a snapshot of the counters and histograms."""
+        exec_time, gil_wait = self.exec_time, self.gil_wait
+        return CallbackStats(self.name, self.calls, self.rate, self.short_returns, self.zero_returns,
+                             self.exceptions, self.total_time, self.max_time, self.max_gil_wait,
+                             exec_time.get_stats() if exec_time is not None else None,
+                             gil_wait.get_stats() if gil_wait is not None else None)
+
+def set_callback_histograms(enabled):
+    """
+    Turns execution time and GIL wait histograms on or off for every
+    callback, including ones created later. The counters are always kept.
+    """
+    global _callback_histograms
+    _callback_histograms = bool(enabled)
+    with _registry_lock:
+        live = list(_live_callbacks)
+    for telemetry in live:
+        telemetry.enable_histograms(enabled)
+
+def get_callback_stats():
+    """
+    Returns a list with the CallbackStats of every instrumented callback:
+    each live CallbackSource and the event, system event and debug handlers.
+    """
+    with _registry_lock:
+        live = list(_live_callbacks)
+    return [telemetry.get_stats() for telemetry in live]
+
+def reset_callback_stats():
+    """Resets the counters and histograms of every instrumented callback."""
+    with _registry_lock:
+        live = list(_live_callbacks)
+    for telemetry in live:
+        telemetry.reset()
@@ -0,0 +1,67 @@
+import io
+import struct
+import wave
+
+import pytest
+
+pytest.importorskip("miniaudio")
+try:
+    from py_openal.loaders import MiniAudioStream
+except Exception as exc:  # The OpenAL shared library is loaded on import.
+    pytest.skip(f"py_openal cannot be imported: {exc}", allow_module_level=True)
+
+
+def _wav_bytes(frames=20000, channels=2, frequency=22050):
+    samples = struct.pack(f'<{frames * channels}h', *((i * 7) % 65536 - 32768 for i in range(frames * channels)))
+    out = io.BytesIO()
+    with wave.open(out, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(frequency)
+        wav.writeframes(samples)
+    return out.getvalue(), samples
+
+
+def _read_to_end(audio_stream, size=4096):
+    chunks = []
+    while True:
+        chunk = audio_stream.get_buffer(size)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+@pytest.mark.parametrize('wrap', [io.BytesIO, lambda data: io.BufferedReader(io.BytesIO(data))])
+def test_streams_encoded_bytes(wrap):
+    data, samples = _wav_bytes()
+    audio_stream = MiniAudioStream(wrap(data))
+    assert (audio_stream.channels, audio_stream.frequency, audio_stream.num_frames) == (2, 22050, 20000)
+    assert _read_to_end(audio_stream) == samples
+
+
+def test_streams_from_an_offset_in_bytesio():
+    data, samples = _wav_bytes()
+    fileobj = io.BytesIO(b'junk' + data)
+    fileobj.seek(4)
+    assert _read_to_end(MiniAudioStream(fileobj)) == samples
+
+
+def test_seek_in_encoded_bytes():
+    data, samples = _wav_bytes()
+    audio_stream = MiniAudioStream(io.BytesIO(data))
+    _read_to_end(audio_stream)
+    assert audio_stream.seek(15000) == 15000
+    assert _read_to_end(audio_stream) == samples[15000 * 4:]
+
+
+def test_seek_keeps_one_decoder(tmp_path):
+    data, samples = _wav_bytes()
+    path = tmp_path / 'tone.wav'
+    path.write_bytes(data)
+    audio_stream = MiniAudioStream(str(path))
+    decoder = audio_stream._decoder
+    _read_to_end(audio_stream)
+    assert audio_stream.seek(100) == 100
+    assert audio_stream.get_buffer(400) == samples[400:800]
+    assert audio_stream._decoder is decoder
+    audio_stream.close()
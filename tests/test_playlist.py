@@ -0,0 +1,61 @@
+import ctypes
+from collections import deque
+
+import pytest
+
+try:
+    from py_openal import al
+    from py_openal.playlist import PlaylistStream
+except Exception as exc:  # The OpenAL shared library is loaded on import.
+    pytest.skip(f"py_openal cannot be imported: {exc}", allow_module_level=True)
+
+
+FRAME_SIZE = 4
+BUFFER_FRAMES = 100
+
+
+def _queued_playlist(tracks):
+    """A PlaylistStream with buffers of the given tracks queued, without a source."""
+    playlist = PlaylistStream.__new__(PlaylistStream)
+    playlist._id = ctypes.c_uint(1)
+    playlist._frame_size = FRAME_SIZE
+    playlist._queued_sizes = deque([BUFFER_FRAMES * FRAME_SIZE] * len(tracks))
+    playlist._queued_tracks = deque(tracks)
+    playlist._unqueue_ids = (ctypes.c_uint * len(tracks))(*range(1, len(tracks) + 1))
+    playlist._free_buffers = deque()
+    playlist._base_frame = 0
+    playlist._playing_index = tracks[0]
+    playlist._unqueued_track = tracks[0]
+    playlist._unqueued_frames = 0
+    playlist._track_callback = None
+    return playlist
+
+
+@pytest.fixture(autouse=True)
+def _no_openal(monkeypatch):
+    monkeypatch.setattr(al, 'alSourceUnqueueBuffers', lambda *args: None)
+
+
+def test_two_buffers_unqueued_across_a_boundary():
+    playlist = _queued_playlist([0, 1, 1, 1])
+    changes = []
+    playlist.set_track_change_callback(lambda stream, index: changes.append(index))
+    # The last buffer of track 0 and the first of track 1 finish in one update.
+    playlist._unqueue_processed(2)
+    assert changes == [1]
+    assert playlist.track_index == 1
+    assert playlist._base_frame == BUFFER_FRAMES
+
+
+def test_boundary_after_the_queue_ran_dry():
+    playlist = _queued_playlist([0, 1, 1])
+    playlist._unqueue_processed(3)
+    assert playlist.track_index == 1
+    assert playlist._base_frame == 2 * BUFFER_FRAMES
+
+
+def test_boundary_at_the_head_buffer():
+    playlist = _queued_playlist([0, 0, 1])
+    playlist._unqueue_processed(2)
+    assert playlist.track_index == 1
+    assert playlist._base_frame == 0